@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Log validation benchmarks on synthetic logs
+
+    python -m log.bench corpus [--files N] [--entries N]
+    python -m log.bench stream [--entries N]
+"""
+
+import argparse
+import io
+import json
+import os
+import random
+import shutil
+import tempfile
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from jsonschema import ValidationError, validate
+
+from . import main as log_main
+from .cache import LogCache
+
+SCHEMA_PATH: Path = Path(__file__).with_name("project_log_schema.json")
+TAGS: List[str] = ["script", "checkpoint", "review", "docs", "refactor", "bugfix"]
+WORDS: List[str] = "fix add parse log schema tree zip snippet index cache test".split()
+
+
+def make_entry(rng: random.Random, day: str) -> Dict[str, Any]:
+    hour: int = rng.randint(6, 20)
+    return {
+        "Date": day,
+        "Tag": rng.choice(TAGS),
+        "Goal": " ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 8))),
+        "Start": f"{hour:02d}:{rng.randint(0, 59):02d}",
+        "End": f"{hour + 1:02d}:{rng.randint(0, 59):02d}",
+        "Duration": rng.randint(5, 120),
+        "Notes": [" ".join(rng.choice(WORDS) for _ in range(5))] * rng.randint(0, 2),
+    }
+
+
+def make_log_corpus(root: Path, files: int, entries: int, seed: int = 1) -> None:
+    """Create files laid out like docs/logs/<year>/<project>/<month>.json, about 1% invalid"""
+    rng = random.Random(seed)
+    for i in range(files):
+        year: int = 2000 + i // 1200
+        month: int = i % 12 + 1
+        folder: Path = root / str(year) / f"project{i // 12 % 100}"
+        folder.mkdir(parents=True, exist_ok=True)
+        data: List[Dict[str, Any]] = [make_entry(rng, f"{year}-{month:02d}-{rng.randint(1, 28):02d}")
+                                      for _ in range(rng.randint(entries // 2, entries * 3 // 2))]
+        if i % 97 == 0:
+            data[-1]["Duration"] = -1
+        (folder / f"{month:02d}.json").write_text(json.dumps(data, indent=2))
+
+
+def legacy_validate_log(file_path: str, schema: Dict[str, Any]) -> int:
+    """validate_log as it was before the compiled validator: jsonschema.validate per file"""
+    total_duration: int = 0
+    with open(file_path, "r") as f:
+        data = json.load(f)
+    try:
+        validate(instance=data, schema=schema)
+        print(f"✅ VALID: {file_path}")
+    except ValidationError as e:
+        print(f"❌ INVALID: {file_path}")
+        print(f"  Path: {'/'.join(map(str, e.path))}")
+        print(f"  Message: {e.message}")
+        return 0
+    for entry in data:
+        total_duration += int(entry.get("Duration", 0))
+    return total_duration
+
+
+def legacy_run(log_files: List[str], schema: Dict[str, Any]) -> Tuple[str, int]:
+    """Sequential walk, checking the schema and building a validator for every file"""
+    buffer = io.StringIO()
+    grand_total: int = 0
+    with redirect_stdout(buffer):
+        for file_path in log_files:
+            grand_total += legacy_validate_log(file_path, schema)
+    return buffer.getvalue(), grand_total
+
+
+def current_run(log_files: List[str], schema: Dict[str, Any], jobs: int,
+                cache_path: Optional[Path] = None) -> Tuple[str, int]:
+    """log.main.validate_logs; returns the verdict lines and the grand total"""
+    cache: Optional[LogCache] = LogCache(str(cache_path), schema) if cache_path else None
+    lines: List[str] = []
+    grand_total: int = 0
+    for _, output, summary in log_main.validate_logs(log_files, schema, jobs, cache):
+        # The legacy baseline skips the per-day listing; compare verdicts only
+        lines.extend(line.replace(" (cached)", "") for line in output.splitlines(keepends=True)
+                     if line.startswith(("✅ VALID", "❌ INVALID", "  Path:", "  Message:")))
+        grand_total += summary["total"]
+    if cache:
+        cache.save()
+    return "".join(lines), grand_total
+
+
+def timed(func: Callable[[], Tuple[str, int]]) -> Tuple[float, Tuple[str, int]]:
+    start: float = time.perf_counter()
+    result: Tuple[str, int] = func()
+    return time.perf_counter() - start, result
+
+
+def bench_validation(files: int, entries: int) -> None:
+    """
+    Legacy per-file validate() vs compiled validator, serial and in a
+    process pool, and with the validation cache empty and filled
+    """
+    cores: int = os.cpu_count() or 1
+    schema: Dict[str, Any] = log_main.load_schema(str(SCHEMA_PATH))
+
+    tmp: Path = Path(tempfile.mkdtemp(prefix="log_bench_"))
+    try:
+        root: Path = tmp / "logs"
+        start: float = time.perf_counter()
+        make_log_corpus(root, files, entries)
+        log_files: List[str] = log_main.find_log_files(str(root))
+        print(f"Created {len(log_files)} log files in {time.perf_counter() - start:.1f}s, {cores} cores\n")
+
+        runs: List[Tuple[str, Callable[[], Tuple[str, int]]]] = [
+            ("legacy", lambda: legacy_run(log_files, schema)),
+            ("compiled", lambda: current_run(log_files, schema, 1)),
+        ]
+        runs += [(f"pool x{jobs}", lambda jobs=jobs: current_run(log_files, schema, jobs))
+                 for jobs in sorted({2, 4, cores}) if jobs > 1]
+        cache_path: Path = tmp / "cache.json"
+        runs += [(label, lambda: current_run(log_files, schema, cores, cache_path))
+                 for label in ("cache cold", "cache warm")]
+
+        print(f"{'mode':<10} {'seconds':>9} {'files/s':>9} {'speedup':>8} {'total min':>11}")
+        results: List[Tuple[str, int]] = []
+        baseline: float = 0.0
+        for label, run in runs:
+            elapsed, result = timed(run)
+            baseline = baseline or elapsed
+            results.append(result)
+            print(f"{label:<10} {elapsed:>9.3f} {len(log_files) / elapsed:>9.0f} "
+                  f"{baseline / elapsed:>7.2f}x {result[1]:>11}")
+
+        print(f"\nSame verdicts, order and totals in every mode: {len(set(results)) == 1}")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+class FirstWrite(io.StringIO):
+    """Discarding stdout that remembers when it was first written to"""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.first: float = 0.0
+
+    def write(self, text: str) -> int:
+        self.first = self.first or time.perf_counter()
+        return len(text)
+
+
+def bench_stream(entries: int) -> None:
+    """Whole-file validate_log vs stream_log on one large, date-ordered log"""
+    rng = random.Random(1)
+    tmp: Path = Path(tempfile.mkdtemp(prefix="log_bench_"))
+    try:
+        path: Path = tmp / "big.json"
+        per_day: int = 12
+        days: List[str] = [f"{2000 + n // 336}-{n // 28 % 12 + 1:02d}-{n % 28 + 1:02d}"
+                           for n in range(entries // per_day + 1)]
+        with open(path, "w") as f:
+            json.dump([make_entry(rng, days[n // per_day]) for n in range(entries)], f, indent=2)
+        print(f"{entries} entries, {path.stat().st_size / 1e6:.0f} MB\n")
+
+        validator = log_main.compile_schema(log_main.load_schema(str(SCHEMA_PATH)))
+        print(f"{'mode':<8} {'seconds':>9} {'first output':>13} {'peak MB':>9} {'total min':>11}")
+        for label, stream in (("whole", False), ("stream", True)):
+            sink = FirstWrite()
+            tracemalloc.start()
+            start: float = time.perf_counter()
+            with redirect_stdout(sink):
+                summary: Dict[str, Any] = log_main.check_log(str(path), validator, stream)
+            elapsed: float = time.perf_counter() - start
+            peak: int = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f"{label:<8} {elapsed:>9.2f} {sink.first - start:>12.2f}s {peak / 1e6:>9.1f} {summary['total']:>11}")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='log validation benchmarks')
+    sub = parser.add_subparsers(dest='bench', required=True)
+
+    corpus = sub.add_parser('corpus', help='Many files: legacy, compiled, pooled and cached validation')
+    corpus.add_argument('--files', type=int, default=5000)
+    corpus.add_argument('--entries', type=int, default=60, help='Average entries per file')
+
+    stream = sub.add_parser('stream', help='One large file: whole-file vs streaming validation')
+    stream.add_argument('--entries', type=int, default=200_000)
+
+    args: argparse.Namespace = parser.parse_args()
+
+    if args.bench == 'corpus':
+        bench_validation(args.files, args.entries)
+    elif args.bench == 'stream':
+        bench_stream(args.entries)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Persistent log validation cache
+
+Records, per log file, the size, mtime and content hash it was validated
+at, together with its verdict and per-day duration totals. A file whose
+stamp still matches is not parsed again: its totals come from the cache.
+Changing the schema drops the whole cache.
+"""
+
+import hashlib
+import json
+import os
+from typing import Any, Dict, Optional, Tuple
+
+CACHE_VERSION: int = 1
+
+# {"valid": bool, "error": {"path", "message"} or None, "days": {date: minutes}, "total": minutes}
+LogSummary = Dict[str, Any]
+# {"size", "mtime", "sha256"} of the file content a summary was made from
+Stamp = Dict[str, Any]
+# Summary keys that describe one run ("seconds", "cached") and are not stored
+RUN_KEYS = ("seconds", "cached")
+
+
+def hash_file(file_path: str) -> str:
+    """SHA-256 of a file's content"""
+    hasher = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def schema_digest(schema: Dict[str, Any]) -> str:
+    return hashlib.sha256(json.dumps(schema, sort_keys=True).encode()).hexdigest()
+
+
+class LogCache:
+    def __init__(self, cache_path: str, schema: Dict[str, Any]) -> None:
+        self.cache_path: str = cache_path
+        self.schema_key: str = schema_digest(schema)
+        self.files: Dict[str, Dict[str, Any]] = self.load()
+        self.hits: int = 0
+        self.misses: int = 0
+
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        """Cached entries, or none if the file is missing, unreadable or for another schema"""
+        try:
+            with open(self.cache_path, 'r') as f:
+                data: Dict[str, Any] = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+        if data.get('version') != CACHE_VERSION or data.get('schema') != self.schema_key:
+            return {}
+        return data.get('files', {})
+
+    def save(self) -> None:
+        """Atomically write the cache, dropping entries for deleted files"""
+        files = {path: entry for path, entry in self.files.items() if os.path.exists(path)}
+        tmp_path: str = self.cache_path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'version': CACHE_VERSION, 'schema': self.schema_key, 'files': files},
+                      f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.cache_path)
+
+    def lookup(self, file_path: str) -> Tuple[Optional[LogSummary], Stamp]:
+        """
+        The cached summary if the file is unchanged, else None, plus the
+        file's current stamp. Size and mtime equal means unchanged without
+        reading; a touched file with the same size is confirmed by hashing.
+        """
+        key: str = os.path.abspath(file_path)
+        st: os.stat_result = os.stat(file_path)
+        entry: Optional[Dict[str, Any]] = self.files.get(key)
+        stamp: Stamp = {'size': st.st_size, 'mtime': st.st_mtime_ns, 'sha256': None}
+
+        if entry is not None and entry['size'] == st.st_size:
+            if entry['mtime'] == st.st_mtime_ns:
+                self.hits += 1
+                return entry['summary'], stamp
+            stamp['sha256'] = hash_file(file_path)
+            if entry['sha256'] == stamp['sha256']:
+                entry['mtime'] = st.st_mtime_ns
+                self.hits += 1
+                return entry['summary'], stamp
+
+        # Hash before the file is parsed, so the stamp can never describe newer content
+        stamp['sha256'] = stamp['sha256'] or hash_file(file_path)
+        self.misses += 1
+        return None, stamp
+
+    def store(self, file_path: str, stamp: Stamp, summary: LogSummary) -> None:
+        """Record the summary for the file content described by stamp"""
+        stored: LogSummary = {key: value for key, value in summary.items() if key not in RUN_KEYS}
+        self.files[os.path.abspath(file_path)] = {**stamp, 'summary': stored}
@@ -1,35 +1,131 @@
+import argparse
+import glob
+import io
 import json
 import os
-from jsonschema import validate, ValidationError
-from typing import Any, Dict, List, DefaultDict
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import redirect_stdout
+from pathlib import Path, PureWindowsPath
+from jsonschema import ValidationError
+from jsonschema.exceptions import best_match
+from jsonschema.protocols import Validator
+from jsonschema.validators import validator_for
+from typing import Any, Dict, Iterator, List, DefaultDict, Optional, Tuple
 from collections import defaultdict
 
-SCHEMA_FILE: str = "C:/Atari-Monk/projects/script/src/log/project_log_schema.json"
-LOG_FOLDER: str = "C:/Atari-Monk/projects/checkpoint/docs/logs"
+from .cache import LogCache, LogSummary, Stamp
+from .stream import is_json_array, stream_log
+
+SCHEMA_FILE: str = str(Path(__file__).with_name("project_log_schema.json"))
+LOG_CACHE_FILE: str = os.path.join(tempfile.gettempdir(), "project_log_cache.json")
+
+# Set in each pool worker by init_worker, so the schema is compiled once per process
+_worker_validator: Optional[Validator] = None
+_worker_listing: bool = True
+
+def get_default_config_path() -> Path:
+    """Get the default config path relative to the script location."""
+    return Path(__file__).with_name("config.json")
+
+def config_relative(base: Path, path: str) -> str:
+    """path resolved against the config folder, unless absolute (C:/... counts on any OS)"""
+    if os.path.isabs(path) or PureWindowsPath(path).is_absolute():
+        return path
+    return str(base / path)
+
+def load_config(config_path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Load the log config: {"schemaFile": path, "roots": [folder or glob, ...]}.
+    Relative paths are resolved against the config file's folder, absolute
+    ones are kept as written. A missing
+    default config is empty; a missing --config is an error.
+    """
+    config_file = Path(config_path) if config_path else get_default_config_path()
+    try:
+        with open(config_file, "r") as f:
+            config: Dict[str, Any] = json.load(f)
+    except FileNotFoundError:
+        if config_path:
+            raise Exception(f"Config file not found: {config_file}")
+        return {}
+    except json.JSONDecodeError:
+        raise Exception(f"Invalid JSON in config file: {config_file}")
+
+    base = config_file.parent
+    if config.get("schemaFile"):
+        config["schemaFile"] = config_relative(base, config["schemaFile"])
+    config["roots"] = [config_relative(base, root) for root in config.get("roots", [])]
+    return config
+
+def expand_roots(patterns: List[str]) -> List[str]:
+    """Log folders for folder paths and globs (e.g. projects/*/docs/logs), in order, without duplicates."""
+    roots: List[str] = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+        folders = [os.path.normpath(match) for match in matches if os.path.isdir(match)]
+        if not folders:
+            print(f"⚠️ Log folder not found: {pattern}", file=sys.stderr)
+        roots.extend(folder for folder in folders if folder not in roots)
+    return roots
+
+def project_of(file_path: str, root: str) -> str:
+    """
+    Project a log file belongs to, from its location: the folder holding
+    docs/logs (.../checkpoint/docs/logs/2025/11.json -> checkpoint), else
+    the log folder's own name.
+    """
+    parts = Path(os.path.abspath(file_path)).parts
+    for i in range(len(parts) - 3, 0, -1):
+        if parts[i].lower() == "docs" and parts[i + 1].lower() == "logs":
+            return parts[i - 1]
+    return os.path.basename(os.path.abspath(root))
 
 def load_schema(schema_path: str) -> Dict[str, Any]:
     """Load JSON schema from a file."""
     with open(schema_path, "r") as f:
         return json.load(f)
 
-def validate_log(file_path: str, schema: Dict[str, Any]) -> int:
+def compile_schema(schema: Dict[str, Any]) -> Validator:
+    """Check the schema once and build a reusable validator for it."""
+    validator_class = validator_for(schema)
+    validator_class.check_schema(schema)
+    return validator_class(schema)
+
+def summarize_entries(entries: List[Dict[str, Any]]) -> LogSummary:
+    """Summary of a valid log without printing it."""
+    day_totals: DefaultDict[str, int] = defaultdict(int)
+    for entry in entries:
+        day_totals[entry.get("Date", "Unknown")] += int(entry.get("Duration", 0))
+    return {"valid": True, "error": None, "days": dict(day_totals), "total": sum(day_totals.values())}
+
+def validate_log(file_path: str, validator: Validator, listing: bool = True) -> LogSummary:
     """
     Validate a single JSON log file against the schema,
-    print per-day task logs (chronologically), and return total duration in minutes.
+    print per-day task logs (chronologically), and return the verdict
+    with per-day and total duration in minutes.
+    Without listing nothing is printed.
     """
     total_duration = 0
+    day_totals: Dict[str, int] = {}
     with open(file_path, "r") as f:
         data = json.load(f)
 
-    # Validate file
-    try:
-        validate(instance=data, schema=schema)
-        print(f"✅ VALID: {file_path}")
-    except ValidationError as e:
-        print(f"❌ INVALID: {file_path}")
-        print(f"  Path: {'/'.join(map(str, e.path))}")
-        print(f"  Message: {e.message}")
-        return 0  # Skip summing if invalid
+    # Validate file (same error jsonschema.validate would raise)
+    error: Optional[ValidationError] = best_match(validator.iter_errors(data))
+    if error is not None:
+        if listing:
+            print(f"❌ INVALID: {file_path}")
+            print(f"  Path: {'/'.join(map(str, error.path))}")
+            print(f"  Message: {error.message}")
+        # Skip summing if invalid
+        return {"valid": False, "error": {"path": "/".join(map(str, error.path)), "message": error.message},
+                "days": {}, "total": 0}
+    if not listing:
+        return summarize_entries(data)
+    print(f"✅ VALID: {file_path}")
 
     # Group entries by Date
     entries_by_date: DefaultDict[str, List[Dict[str, Any]]] = defaultdict(list)
@@ -66,23 +162,272 @@ def validate_log(file_path: str, schema: Dict[str, Any]) -> int:
                 print(f"    📝 Note: {n}")
 
         print(f"  ➤ Total for {date}: {day_total} minutes")
+        day_totals[date] = day_total
+
+    return {"valid": True, "error": None, "days": day_totals, "total": total_duration}
+
+def check_log(file_path: str, validator: Validator, stream: bool = False, listing: bool = True) -> LogSummary:
+    """validate_log, or stream_log when streaming a file that holds a JSON array."""
+    if stream and is_json_array(file_path):
+        return stream_log(file_path, validator, listing)
+    return validate_log(file_path, validator, listing)
+
+def render_cached_log(file_path: str, summary: LogSummary, listing: bool = True) -> str:
+    """Output for a file whose summary came from the cache: verdict and per-day totals only."""
+    if not listing:
+        return ""
+    if not summary["valid"]:
+        return (f"❌ INVALID (cached): {file_path}\n"
+                f"  Path: {summary['error']['path']}\n"
+                f"  Message: {summary['error']['message']}\n")
+    lines = [f"✅ VALID (cached): {file_path}\n"]
+    lines += [f"  ➤ Total for {date}: {minutes} minutes\n" for date, minutes in sorted(summary["days"].items())]
+    return "".join(lines)
+
+def render_log(
+    file_path: str,
+    validator: Validator,
+    stream: bool = False,
+    listing: bool = True
+) -> Tuple[str, LogSummary]:
+    """
+    Run check_log with its output captured; returns (output, summary),
+    the summary carrying the time taken in "seconds". Streaming prints
+    directly instead, so the output is empty.
+    """
+    buffer = io.StringIO()
+    start = time.perf_counter()
+    if stream:
+        summary = check_log(file_path, validator, stream, listing)
+    else:
+        with redirect_stdout(buffer):
+            summary = check_log(file_path, validator, stream, listing)
+    return buffer.getvalue(), {**summary, "seconds": time.perf_counter() - start}
+
+def init_worker(schema: Dict[str, Any], listing: bool) -> None:
+    global _worker_validator, _worker_listing
+    _worker_validator = compile_schema(schema)
+    _worker_listing = listing
 
-    return total_duration
+def render_log_in_worker(file_path: str) -> Tuple[str, LogSummary]:
+    assert _worker_validator is not None
+    return render_log(file_path, _worker_validator, listing=_worker_listing)
+
+def find_log_files(log_folder: str) -> List[str]:
+    """All .json files below log_folder, in a stable (sorted) order."""
+    log_files: List[str] = []
+    for root, dirs, files in os.walk(log_folder):
+        dirs.sort()
+        for file in sorted(files):
+            if file.endswith(".json"):
+                log_files.append(os.path.join(root, file))
+    return log_files
+
+def scan_roots(roots: List[str]) -> List[Tuple[str, str]]:
+    """
+    (root, file) for every log file below the roots. Roots are walked
+    concurrently; files come back grouped by root, in root order. A file
+    reachable from two roots is listed once, under the first.
+    """
+    if not roots:
+        return []
+    with ThreadPoolExecutor(max_workers=min(len(roots), 16)) as pool:
+        found: List[List[str]] = list(pool.map(find_log_files, roots))
+
+    seen = set()
+    log_files: List[Tuple[str, str]] = []
+    for root, files in zip(roots, found):
+        for file_path in files:
+            key = os.path.realpath(file_path)
+            if key not in seen:
+                seen.add(key)
+                log_files.append((root, file_path))
+    return log_files
+
+def resolve_roots(folders: List[str], schema_path: Optional[str], config_path: Optional[str]) -> Tuple[List[str], str]:
+    """Log folders and schema file from the command line, falling back to the config."""
+    config = load_config(config_path) if config_path or not folders or not schema_path else {}
+    patterns = folders or config.get("roots", [])
+    if not patterns:
+        raise Exception(f"No log folders: pass them as arguments or set 'roots' in {config_path or get_default_config_path()}")
+    return expand_roots(patterns), schema_path or config.get("schemaFile") or SCHEMA_FILE
+
+def render_logs(
+    log_files: List[str],
+    schema: Dict[str, Any],
+    jobs: int = 1,
+    stream: bool = False,
+    listing: bool = True
+) -> Iterator[Tuple[str, LogSummary]]:
+    """
+    Yield (output, summary) per log file, in the order given.
+    With jobs > 1 files are validated in a process pool, each worker
+    compiling the schema once; results still come back in file order.
+    Streaming prints while each file is read, so files are validated
+    one at a time in this process and the output is empty.
+    """
+    if stream or jobs <= 1 or len(log_files) <= 1:
+        validator = compile_schema(schema)
+        for file_path in log_files:
+            yield render_log(file_path, validator, stream, listing)
+        return
+
+    chunksize = max(1, len(log_files) // (jobs * 8))
+    with ProcessPoolExecutor(max_workers=jobs, initializer=init_worker, initargs=(schema, listing)) as pool:
+        yield from pool.map(render_log_in_worker, log_files, chunksize=chunksize)
+
+def validate_logs(
+    log_files: List[str],
+    schema: Dict[str, Any],
+    jobs: int = 1,
+    cache: Optional[LogCache] = None,
+    stream: bool = False,
+    listing: bool = True
+) -> Iterator[Tuple[str, str, LogSummary]]:
+    """
+    Yield (file, output, summary) per log file, in the order given.
+    Files unchanged since they were cached are not parsed again;
+    the rest are validated (see render_logs) and added to the cache.
+    Summaries say whether they are "cached" and how many "seconds" the
+    file took.
+    """
+    cached: Dict[str, LogSummary] = {}
+    stamps: Dict[str, Stamp] = {}
+    if cache:
+        for file_path in log_files:
+            summary, stamps[file_path] = cache.lookup(file_path)
+            if summary is not None:
+                cached[file_path] = summary
+
+    rendered = render_logs([f for f in log_files if f not in cached], schema, jobs, stream, listing)
+    for file_path in log_files:
+        if file_path in cached:
+            summary = cached[file_path]
+            yield file_path, render_cached_log(file_path, summary, listing), {**summary, "seconds": 0.0, "cached": True}
+            continue
+        output, summary = next(rendered)
+        if cache:
+            cache.store(file_path, stamps[file_path], summary)
+        yield file_path, output, {**summary, "cached": False}
+
+def summary_line(file_path: str, root: str, project: str, summary: LogSummary) -> str:
+    """One --summary line for a file."""
+    name = f"[{project}] {os.path.relpath(file_path, root)}"
+    if not summary["valid"]:
+        return f"❌ {name}: INVALID at {summary['error']['path'] or '(root)'}: {summary['error']['message']}\n"
+    return f"✅ {name}: {summary['total']} minutes\n"
+
+def add_to_project(projects: Dict[str, Dict[str, int]], project: str, summary: LogSummary) -> None:
+    totals = projects.setdefault(project, {"files": 0, "invalid_files": 0, "total": 0})
+    totals["files"] += 1
+    totals["invalid_files"] += 0 if summary["valid"] else 1
+    totals["total"] += summary["total"]
+
+def project_lines(projects: Dict[str, Dict[str, int]]) -> List[str]:
+    lines = ["📁 PROJECT TOTALS\n"]
+    width = max(len(name) for name in projects)
+    for name, totals in sorted(projects.items()):
+        invalid = f", {totals['invalid_files']} invalid" if totals["invalid_files"] else ""
+        lines.append(f"  {name:<{width}}  {totals['total']:>8} minutes  ({totals['files']} files{invalid})\n")
+    return lines
+
+def json_report(
+    roots: List[str],
+    schema_path: str,
+    files: List[Dict[str, Any]],
+    projects: Dict[str, Dict[str, int]],
+    seconds: float,
+    cache: Optional[LogCache]
+) -> Dict[str, Any]:
+    """The --json report: per-file verdicts, errors and daily totals, project and overall totals, timings."""
+    daily_totals: DefaultDict[str, int] = defaultdict(int)
+    for item in files:
+        for date, minutes in item["days"].items():
+            daily_totals[date] += minutes
+    return {
+        "roots": roots,
+        "schema": schema_path,
+        "files": [{**item, "seconds": round(item["seconds"], 6)} for item in files],
+        "valid_files": sum(1 for item in files if item["valid"]),
+        "invalid_files": sum(1 for item in files if not item["valid"]),
+        "daily_totals": dict(sorted(daily_totals.items())),
+        "projects": dict(sorted(projects.items())),
+        "grand_total": sum(item["total"] for item in files),
+        "timings": {
+            "total_seconds": round(seconds, 6),
+            "validation_seconds": round(sum(item["seconds"] for item in files), 6),
+        },
+        "cache": {"hits": cache.hits, "misses": cache.misses} if cache else None,
+    }
 
 def main() -> None:
     """Main entry point to validate all JSON logs and calculate totals."""
-    schema = load_schema(SCHEMA_FILE)
+    if sys.argv[1:2] == ["query"]:
+        from .query import query_main
+        query_main(sys.argv[2:])
+        return
+
+    parser = argparse.ArgumentParser(description="Validate project logs and total their durations",
+                                     epilog="Run 'log query -h' to aggregate durations by tag and date.")
+    parser.add_argument("folders", nargs="*", metavar="folder",
+                        help="Log folders or globs, e.g. 'projects/*/docs/logs' (default: roots in the config)")
+    parser.add_argument("--config", help="Config file (default: config.json next to this script)")
+    parser.add_argument("--schema", help="Schema file (default: schemaFile in the config, else the bundled schema)")
+    parser.add_argument("--jobs", "-j", type=int, default=0,
+                        help="Validation processes (default: all cores, 1 = no pool)")
+    parser.add_argument("--cache", default=LOG_CACHE_FILE, help="Validation cache file (default: %(default)s)")
+    parser.add_argument("--no-cache", action="store_true", help="Parse every file and leave the cache alone")
+    parser.add_argument("--stream", action="store_true",
+                        help="Parse files item by item, printing as they are read (for very large logs; no pool)")
+    output_mode = parser.add_mutually_exclusive_group()
+    output_mode.add_argument("--summary", action="store_true", help="Print only per-file and grand totals")
+    output_mode.add_argument("--json", action="store_true",
+                             help="Print one JSON report: per-file validity, error paths, daily totals, timings")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    try:
+        roots, schema_path = resolve_roots(args.folders, args.schema, args.config)
+        schema = load_schema(schema_path)
+    except Exception as e:
+        print(f"❌ Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    cache = None if args.no_cache else LogCache(args.cache, schema)
+    listing = not (args.summary or args.json)
     grand_total = 0
+    # --summary and --json output is collected and written once at the end
+    lines: List[str] = []
+    files: List[Dict[str, Any]] = []
+    projects: Dict[str, Dict[str, int]] = {}
 
-    for root, _, files in os.walk(LOG_FOLDER):
-        for file in files:
-            if file.endswith(".json"):
-                file_path = os.path.join(root, file)
-                monthly_total = validate_log(file_path, schema)
-                print(f"\n📊 Total duration in {file}: {monthly_total} minutes\n")
-                grand_total += monthly_total
+    log_files = scan_roots(roots)
+    root_of: Dict[str, str] = {file_path: root for root, file_path in log_files}
+    for file_path, output, summary in validate_logs([f for _, f in log_files], schema, jobs, cache,
+                                                    args.stream, listing):
+        project = project_of(file_path, root_of[file_path])
+        add_to_project(projects, project, summary)
+        grand_total += summary["total"]
+        if args.json:
+            files.append({"path": file_path, "project": project, **summary})
+        elif args.summary:
+            lines.append(summary_line(file_path, root_of[file_path], project, summary))
+        else:
+            sys.stdout.write(f"{output}\n📊 Total duration in {os.path.basename(file_path)}: "
+                             f"{summary['total']} minutes\n\n")
 
-    print(f"📌 GRAND TOTAL DURATION: {grand_total} minutes")
+    if cache:
+        cache.save()
+    if args.json:
+        report = json_report(roots, schema_path, files, projects, time.perf_counter() - start, cache)
+        sys.stdout.write(json.dumps(report, indent=2, ensure_ascii=False) + "\n")
+        return
+    if cache:
+        lines.append(f"🗃️ Cache: {cache.hits} unchanged, {cache.misses} parsed\n")
+    if projects:
+        lines += project_lines(projects)
+    lines.append(f"📌 GRAND TOTAL DURATION: {grand_total} minutes\n")
+    sys.stdout.write("".join(lines))
 
 if __name__ == "__main__":
     main()
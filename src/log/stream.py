@@ -0,0 +1,153 @@
+"""
+Streaming log validation for very large log files
+
+iter_json_array decodes a top-level JSON array one item at a time with
+json.JSONDecoder.raw_decode over a chunked read buffer, so memory holds
+one chunk plus the item being decoded. stream_log validates each item
+against the schema's "items" subschema as it arrives and prints a day as
+soon as the next day starts: only the current day's entries are kept,
+to sort them by Start. Logs are written in date order; a day that comes
+back later in the file is printed as a second block, its total still
+added to the same day.
+"""
+
+import json
+from jsonschema import ValidationError
+from jsonschema.exceptions import best_match
+from jsonschema.protocols import Validator
+from typing import Any, Dict, Iterator, List, Optional, TextIO
+
+from .cache import LogSummary
+
+CHUNK_SIZE: int = 64 * 1024
+WHITESPACE: str = " \t\n\r"
+
+
+def is_json_array(file_path: str) -> bool:
+    """True if the file's first non-whitespace character opens an array"""
+    with open(file_path, "r") as f:
+        while True:
+            chunk: str = f.read(CHUNK_SIZE)
+            if not chunk:
+                return False
+            stripped: str = chunk.lstrip(WHITESPACE)
+            if stripped:
+                return stripped[0] == "["
+
+
+def iter_json_array(f: TextIO, chunk_size: int = CHUNK_SIZE) -> Iterator[Any]:
+    """Yield the items of the JSON array read from f, one at a time"""
+    decoder = json.JSONDecoder()
+    buffer: str = ""
+    pos: int = 0
+    eof: bool = False
+
+    def read_more() -> bool:
+        # Drop what is consumed and append the next chunk; False at end of file
+        nonlocal buffer, pos, eof
+        chunk: str = f.read(max(chunk_size, len(buffer) - pos))
+        buffer, pos = buffer[pos:] + chunk, 0
+        eof = not chunk
+        return not eof
+
+    def next_char() -> str:
+        # Skip whitespace and return the next character without consuming it
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos] in WHITESPACE:
+                pos += 1
+            if pos < len(buffer):
+                return buffer[pos]
+            if not read_more():
+                return ""
+
+    if next_char() != "[":
+        raise Exception(f"{getattr(f, 'name', 'input')}: not a JSON array")
+    pos += 1
+    if next_char() == "]":
+        return
+
+    while True:
+        next_char()
+        while True:
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if read_more():
+                    continue
+                raise
+            # A number cut by the chunk boundary ("-500." or "12" of "123") decodes
+            # too; accept it only when a delimiter follows, else read on and decode again
+            complete: bool = end < len(buffer) and (
+                buffer[end] in ",]" + WHITESPACE or not isinstance(item, (int, float)) or isinstance(item, bool))
+            if complete or eof:
+                break
+            read_more()
+        pos = end
+        yield item
+
+        separator: str = next_char()
+        if separator == "]":
+            return
+        if separator != ",":
+            raise Exception(f"{getattr(f, 'name', 'input')}: expected ',' or ']' at offset {pos}")
+        pos += 1
+
+
+def print_day(date: str, entries: List[Dict[str, Any]]) -> int:
+    """Print one day's entries by Start time (as validate_log does), returns the day total"""
+    day_total: int = 0
+    print(f"\n📅 Date: {date}")
+    for idx, entry in enumerate(sorted(entries, key=lambda e: e.get("Start", "00:00")), start=1):
+        duration_int: int = int(entry.get("Duration", 0))
+        day_total += duration_int
+        print(f"  Entry {idx} | Tag: {entry.get('Tag', '')} | {duration_int} min | Start: {entry.get('Start', '??:??')}")
+        print(f"    ✅ Goal: {entry.get('Goal', '')}")
+        for n in entry.get("Notes", []):
+            print(f"    📝 Note: {n}")
+    print(f"  ➤ Total for {date}: {day_total} minutes")
+    return day_total
+
+
+def stream_log(file_path: str, validator: Validator, listing: bool = True) -> LogSummary:
+    """
+    Streaming counterpart of validate_log for a file holding a JSON array:
+    prints days while the file is read and the verdict at the end. An
+    invalid item stops the file; days before it have already been
+    printed, but the file counts 0 minutes. Without listing nothing is
+    printed.
+    """
+    item_validator: Validator = validator.evolve(schema=validator.schema.get("items", {}))
+    day_totals: Dict[str, int] = {}
+    current_date: Optional[str] = None
+    day_entries: List[Dict[str, Any]] = []
+
+    def close_day(date: str, entries: List[Dict[str, Any]]) -> None:
+        day_total: int = print_day(date, entries) if listing else sum(int(e.get("Duration", 0)) for e in entries)
+        day_totals[date] = day_totals.get(date, 0) + day_total
+
+    with open(file_path, "r") as f:
+        for index, entry in enumerate(iter_json_array(f)):
+            error: Optional[ValidationError] = best_match(item_validator.iter_errors(entry))
+            if error is not None:
+                if listing:
+                    print(f"❌ INVALID: {file_path}")
+                    print(f"  Path: {'/'.join(map(str, [index, *error.path]))}")
+                    print(f"  Message: {error.message}")
+                return {"valid": False, "error": {"path": "/".join(map(str, [index, *error.path])),
+                                                  "message": error.message},
+                        "days": {}, "total": 0}
+
+            date: str = entry.get("Date", "Unknown")
+            if date != current_date and day_entries:
+                close_day(current_date, day_entries)
+                day_entries = []
+            current_date = date
+            day_entries.append(entry)
+
+    if day_entries:
+        close_day(current_date, day_entries)
+
+    if listing:
+        print(f"✅ VALID: {file_path}")
+    return {"valid": True, "error": None, "days": day_totals, "total": sum(day_totals.values())}
@@ -0,0 +1,196 @@
+"""
+Compiled .gitignore matching
+
+Each .gitignore file is compiled into two regexes (one for directories,
+one for files, since "dir/" rules only match directories). The rules are
+joined in reverse order so the first alternative that matches is the
+last matching rule, which decides like in git; the matched group says
+whether that rule was a negation.
+
+A GitignoreStack holds the rule sets from the repository root down to the
+directory being walked. Deeper files take precedence, and walkers prune
+ignored directories, so their contents are never listed (which is also
+why a file inside an ignored directory cannot be re-included).
+"""
+
+import os
+import re
+from typing import Iterable, List, Optional, Pattern, Tuple
+
+IGNORE_FILE: str = ".gitignore"
+
+
+def translate(pattern: str) -> str:
+    """Translate one gitignore glob into a regex (without anchoring)"""
+    out: List[str] = []
+    i: int = 0
+    n: int = len(pattern)
+
+    while i < n:
+        c: str = pattern[i]
+        if c == '*':
+            j: int = i
+            while j < n and pattern[j] == '*':
+                j += 1
+            whole_segment: bool = (i == 0 or pattern[i - 1] == '/') and (j == n or pattern[j] == '/')
+            if j - i == 2 and whole_segment:
+                if j == n:
+                    out.append('.*')
+                else:
+                    out.append('(?:.*/)?')
+                    j += 1
+            else:
+                out.append('[^/]*')
+            i = j
+            continue
+
+        if c == '?':
+            out.append('[^/]')
+        elif c == '[':
+            end: int = pattern.find(']', i + 2)
+            if end == -1:
+                out.append(re.escape(c))
+            else:
+                body: str = pattern[i + 1:end]
+                negate: bool = body[:1] in ('!', '^')
+                if negate:
+                    body = body[1:]
+                body = ''.join('\\' + ch if ch in '\\^[]' else ch for ch in body)
+                out.append(f"[^/{body}]" if negate else f"[{body}]")
+                i = end
+        elif c == '\\' and i + 1 < n:
+            i += 1
+            out.append(re.escape(pattern[i]))
+        else:
+            out.append(re.escape(c))
+        i += 1
+
+    return ''.join(out)
+
+
+def parse_line(line: str) -> Optional[Tuple[str, bool, bool]]:
+    """One .gitignore line as (regex, negated, dir_only), None for blanks and comments"""
+    line = line.rstrip('\r\n')
+    if not line or line.startswith('#'):
+        return None
+
+    while line.endswith(' ') and not line.endswith('\\ '):
+        line = line[:-1]
+
+    negated: bool = line.startswith('!')
+    if negated:
+        line = line[1:]
+
+    dir_only: bool = line.endswith('/')
+    line = line.rstrip('/')
+    if not line:
+        return None
+
+    anchored: bool = '/' in line
+    regex: str = translate(line.lstrip('/'))
+    if not anchored:
+        regex = '(?:.*/)?' + regex
+    return regex, negated, dir_only
+
+
+def compile_rules(rules: List[Tuple[str, bool, bool]]) -> Tuple[Optional[Pattern[str]], Tuple[bool, ...]]:
+    """Join rules last-first into one regex; the tuple maps group number - 1 to negated"""
+    if not rules:
+        return None, ()
+    ordered = list(reversed(rules))
+    pattern: Pattern[str] = re.compile('|'.join(f"({regex})" for regex, _, _ in ordered), re.DOTALL)
+    return pattern, tuple(negated for _, negated, _ in ordered)
+
+
+class IgnoreRules:
+    """The compiled rules of one .gitignore file, matching paths below base"""
+
+    def __init__(self, base: str, lines: Iterable[str]) -> None:
+        self.base: str = base.rstrip('/\\')
+        parsed: List[Tuple[str, bool, bool]] = [rule for rule in map(parse_line, lines) if rule is not None]
+        self.dir_pattern, self.dir_negated = compile_rules(parsed)
+        self.file_pattern, self.file_negated = compile_rules([rule for rule in parsed if not rule[2]])
+
+    @classmethod
+    def load(cls, base: str, ignore_file: str) -> Optional['IgnoreRules']:
+        try:
+            with open(ignore_file, 'r', encoding='utf-8', errors='replace') as f:
+                rules: IgnoreRules = cls(base, f)
+        except OSError:
+            return None
+        return rules if rules.dir_pattern is not None else None
+
+    def match(self, rel_path: str, is_dir: bool) -> Optional[bool]:
+        """True if ignored, False if re-included by a negation, None if no rule matches"""
+        pattern: Optional[Pattern[str]] = self.dir_pattern if is_dir else self.file_pattern
+        if pattern is None:
+            return None
+        m = pattern.fullmatch(rel_path)
+        if m is None:
+            return None
+        negated: Tuple[bool, ...] = self.dir_negated if is_dir else self.file_negated
+        return not negated[m.lastindex - 1]
+
+
+class GitignoreStack:
+    """
+    The .gitignore rule sets in effect for one directory of a walk.
+    Immutable: entering a subdirectory returns a new stack, so it can be
+    handed to concurrent listings.
+    """
+
+    def __init__(self, rules: Tuple[IgnoreRules, ...] = ()) -> None:
+        self.rules: Tuple[IgnoreRules, ...] = rules
+
+    @classmethod
+    def for_root(cls, root: str) -> 'GitignoreStack':
+        """
+        Stack for walking root: the .gitignore files (and .git/info/exclude)
+        of the enclosing repository from its top down to root's parent.
+        root's own .gitignore is picked up when the walk enters it.
+        """
+        root = os.path.abspath(root)
+        top: str = root
+        while not os.path.exists(os.path.join(top, '.git')):
+            parent: str = os.path.dirname(top)
+            if parent == top:
+                return cls()
+            top = parent
+
+        parents: List[str] = []
+        current: str = root
+        while current != top:
+            current = os.path.dirname(current)
+            parents.append(current)
+        parents.reverse()
+
+        stack: GitignoreStack = cls()
+        exclude: Optional[IgnoreRules] = IgnoreRules.load(top, os.path.join(top, '.git', 'info', 'exclude'))
+        if exclude is not None:
+            stack = cls((exclude,))
+        for directory in parents:
+            stack = stack.enter(directory)
+        return stack
+
+    def enter(self, dir_path: str, names: Optional[Iterable[str]] = None) -> 'GitignoreStack':
+        """
+        Stack for the contents of dir_path. Pass the directory's listed
+        names to skip the open() when it has no .gitignore.
+        """
+        if names is not None and IGNORE_FILE not in names:
+            return self
+        rules: Optional[IgnoreRules] = IgnoreRules.load(dir_path, os.path.join(dir_path, IGNORE_FILE))
+        if rules is None:
+            return self
+        return GitignoreStack(self.rules + (rules,))
+
+    def ignored(self, path: str, is_dir: bool) -> bool:
+        """True if path (below the directory this stack was entered for) is ignored"""
+        for rules in reversed(self.rules):
+            rel: str = path[len(rules.base) + 1:]
+            if os.sep != '/':
+                rel = rel.replace(os.sep, '/')
+            decision: Optional[bool] = rules.match(rel, is_dir)
+            if decision is not None:
+                return decision
+        return False
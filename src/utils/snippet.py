@@ -1,32 +1,38 @@
 #!/usr/bin/env python3
 from __future__ import annotations
+import glob
+import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from .clipboard_utils import copy_to_clipboard, paste_from_clipboard
+from .snippet_search import SearchIndex
+from .snippet_store import Snippet, SnippetStore, estimate_tokens, open_store
 from pathlib import Path
-from typing import List, Optional
+import time
+from typing import Dict, List, Optional, Set, Tuple
 
 # ------------------------------------------------------------
 # Constants
 # ------------------------------------------------------------
 
-SNIPPET_FILE: Path = Path("/tmp/all_snippets.txt")
-SEPARATOR: str = "\n\n===SNIPPET===\n\n"
 VALID_TYPES: List[str] = ["context", "task", "prompt", "generic"]
+PREVIEW_CHARS: int = 50
 
+# Prompt layout, and the order sections are filled in when packing to a budget
+SECTIONS: List[Tuple[str, str]] = [
+    ("context", "### CONTEXT"),
+    ("task", "### TASK"),
+    ("generic", "### MISC"),
+    ("prompt", "### PROMPTS"),
+]
+DIRECT_PROMPT_TITLE: str = "### DIRECT PROMPT"
+BUDGET_PRIORITY: List[str] = ["task", "prompt", "context", "generic"]
 
-# ------------------------------------------------------------
-# Storage helpers
-# ------------------------------------------------------------
-
-def load_snippets() -> List[str]:
-    if not SNIPPET_FILE.exists():
-        return []
-    content: str = SNIPPET_FILE.read_text(encoding="utf-8")
-    return [s for s in content.split(SEPARATOR) if s.strip()]
-
-
-def save_snippets(snippets: List[str]) -> None:
-    SNIPPET_FILE.write_text(SEPARATOR.join(snippets), encoding="utf-8")
+# Bulk ingestion (-f with a glob or a directory)
+BULK_MAX_FILE_SIZE: int = 256 * 1024
+BULK_READ_THREADS: int = 8
+BULK_SKIP_DIRS: Set[str] = {".git", "node_modules", "__pycache__", ".venv", "dist", ".pytest_cache"}
+BINARY_SNIFF_BYTES: int = 8192
 
 
 # ------------------------------------------------------------
@@ -39,28 +45,115 @@ def add_snippet(
     stype: Optional[str] = None,
     source: Optional[str] = None
 ) -> None:
-    snippets: List[str] = load_snippets()
+    snippet = Snippet(
+        stype=stype if stype in VALID_TYPES else "generic",
+        source=source or "",
+        description=description or "",
+        created=time.time(),
+        body=content
+    )
+    store = open_store()
+    total: int = store.append(snippet)
+
+    # Keep the search index current: only the new snippet is indexed
+    index = SearchIndex(store)
+    index.sync()
+    index.close()
 
-    meta: List[str] = []
+    print(f"Snippet saved. Total snippets: {total}")
 
-    if source:
-        meta.append(f"Source: {source}")
 
-    if description:
-        meta.append(f"Description: {description}")
+# ------------------------------------------------------------
+# Bulk ingestion
+# ------------------------------------------------------------
+
+def is_bulk_path(pattern: str) -> bool:
+    """A directory or glob; an existing file is never a glob (e.g. app/[id]/page.tsx)"""
+    path = Path(pattern)
+    if path.is_file():
+        return False
+    return path.is_dir() or any(c in pattern for c in "*?[")
+
+
+def expand_paths(pattern: str) -> List[Path]:
+    """Files under a directory or matching a glob, sorted; either way none inside BULK_SKIP_DIRS"""
+    if Path(pattern).is_dir():
+        paths: List[Path] = []
+        for root, dirs, files in os.walk(pattern):
+            dirs[:] = sorted(d for d in dirs if d not in BULK_SKIP_DIRS)
+            paths.extend(Path(root) / name for name in sorted(files))
+        return paths
+    matches: List[Path] = [Path(p) for p in glob.glob(pattern, recursive=True) if os.path.isfile(p)]
+    return sorted(p for p in matches if BULK_SKIP_DIRS.isdisjoint(p.parent.parts))
+
+
+def read_text_file(path: Path, max_size: int) -> Tuple[Optional[str], str]:
+    """(content, status); content is None when the file is skipped"""
+    try:
+        size: int = path.stat().st_size
+        if size > max_size:
+            return None, f"too large ({size} > {max_size} bytes)"
+        data: bytes = path.read_bytes()
+    except OSError as e:
+        return None, f"unreadable ({e.strerror})"
+
+    if b"\0" in data[:BINARY_SNIFF_BYTES]:
+        return None, "binary"
+    try:
+        return data.decode("utf-8"), "added"
+    except UnicodeDecodeError:
+        return None, "not UTF-8 text"
+
+
+def add_snippets_bulk(
+    pattern: str,
+    description: Optional[str] = None,
+    stype: Optional[str] = None,
+    max_size: int = BULK_MAX_FILE_SIZE
+) -> None:
+    """
+    Add every text file under a directory or matching a glob ('**' recurses).
+    Files are read concurrently and all snippets are committed with a
+    single store write and a single index update.
+    """
+    start: float = time.perf_counter()
+    paths: List[Path] = expand_paths(pattern)
+    if not paths:
+        print(f"No files match: {pattern}")
+        return
 
-    if stype in VALID_TYPES:
-        meta.append(f"Type: {stype}")
-    else:
-        meta.append("Type: generic")
+    with ThreadPoolExecutor(max_workers=BULK_READ_THREADS) as pool:
+        results: List[Tuple[Optional[str], str]] = list(pool.map(lambda p: read_text_file(p, max_size), paths))
+
+    created: float = time.time()
+    snippets: List[Snippet] = []
+    for path, (content, status) in zip(paths, results):
+        if content is None:
+            print(f"  skipped  {path}  [{status}]")
+            continue
+        snippet = Snippet(
+            stype=stype if stype in VALID_TYPES else "generic",
+            source=str(path),
+            description=description or "",
+            created=created,
+            body=content
+        )
+        snippet.measure()
+        snippets.append(snippet)
+        print(f"  added    {path}  ({len(content)} chars, ~{snippet.tokens} tokens)")
 
-    metadata: str = " | ".join(meta)
-    snippet_with_meta: str = f"--- {metadata} ---\n{content}"
+    if not snippets:
+        print(f"No text files to add from {len(paths)} matches.")
+        return
 
-    snippets.append(snippet_with_meta)
-    save_snippets(snippets)
+    store = open_store()
+    total: int = store.append_many(snippets)
+    index = SearchIndex(store)
+    index.sync()
+    index.close()
 
-    print(f"Snippet saved. Total snippets: {len(snippets)}")
+    elapsed: float = time.perf_counter() - start
+    print(f"Added {len(snippets)} of {len(paths)} files in {elapsed:.2f}s. Total snippets: {total}")
 
 
 # ------------------------------------------------------------
@@ -68,80 +161,161 @@ def add_snippet(
 # ------------------------------------------------------------
 
 def print_snippets() -> None:
-    snippets: List[str] = load_snippets()
-    if not snippets:
+    store = open_store()
+    if not store.count():
         print("No snippets stored.")
         return
 
     print("Stored snippets:\n")
-    for i, snip in enumerate(snippets, start=1):
-        lines: List[str] = snip.split("\n")
-        metadata: str = lines[0] if lines else ""
+    # Only headers and a short body prefix are read, never whole bodies
+    for snippet, body_prefix in store.headers(PREVIEW_CHARS * 4):
+        print(f"[{snippet.id + 1}] Source: {snippet.source}")
+        print(f"    {snippet.header()}")
+        print(f"    Preview: {preview_text(body_prefix)}...\n")
 
-        # Extract the source from metadata if present
-        source_info = ""
-        if "Source:" in metadata:
-            parts = [part.strip() for part in metadata.split("|")]
-            for part in parts:
-                if part.startswith("Source:"):
-                    source_info = part.replace("Source:", "").strip()
-                    break
 
-        # Safe content preview: skip metadata line
-        preview_block = "\n".join(lines[1:]).strip()
-        preview: str = preview_block.replace("\r", "").replace("\n", " ")[:50]
+def preview_text(body_prefix: str) -> str:
+    return body_prefix.strip().replace("\r", "").replace("\n", " ")[:PREVIEW_CHARS]
 
-        print(f"[{i}] Source: {source_info}")
-        print(f"    {metadata}")
-        print(f"    Preview: {preview}...\n")
+
+# ------------------------------------------------------------
+# Search
+# ------------------------------------------------------------
+
+def search_snippets(
+    query: str,
+    stype: Optional[str] = None,
+    source: Optional[str] = None,
+    limit: int = 10
+) -> None:
+    store = open_store()
+    index = SearchIndex(store)
+    index.sync()
+
+    start: float = time.perf_counter()
+    hits = index.search(query, stype, source, limit)
+    elapsed: float = time.perf_counter() - start
+    index.close()
+
+    if not hits:
+        print(f"No snippets match: {query}")
+        return
+
+    previews = store.headers(PREVIEW_CHARS * 4, [doc_id for doc_id, _ in hits])
+    for (_, score), (snippet, body_prefix) in zip(hits, previews):
+        print(f"[{snippet.id + 1}] score {score:.2f}")
+        print(f"    {snippet.header()}")
+        print(f"    Preview: {preview_text(body_prefix)}...\n")
+
+    print(f"{len(hits)} results in {elapsed * 1000:.1f} ms")
 
 
 # ------------------------------------------------------------
 # POP — generate structured prompt
 # ------------------------------------------------------------
 
-def pop_snippets(prompt: Optional[str] = None) -> None:
-    snippets: List[str] = load_snippets()
-    if not snippets:
+def section_of(snippet: Snippet) -> str:
+    return snippet.stype if snippet.stype in ("context", "task", "prompt") else "generic"
+
+
+def build_prompt(snippets: List[Snippet], prompt: Optional[str] = None) -> str:
+    sections: Dict[str, List[str]] = {name: [] for name, _ in SECTIONS}
+
+    # classify snippets by their stored type
+    for snippet in snippets:
+        sections[section_of(snippet)].append(f"{snippet.header()}\n{snippet.body}")
+
+    blocks: List[str] = [
+        f"{title}\n" + "\n\n".join(sections[name]) for name, title in SECTIONS if sections[name]
+    ]
+    if prompt:
+        blocks.append(f"{DIRECT_PROMPT_TITLE}\n{prompt}")
+
+    return "\n\n".join(blocks)
+
+
+def select_within_budget(
+    store: SnippetStore,
+    budget: int,
+    prompt: Optional[str] = None
+) -> Tuple[List[Snippet], List[Tuple[Snippet, int]], List[Snippet], int]:
+    """
+    Pick snippets for a prompt of at most budget estimated tokens, working
+    from the token counts and digests cached in the headers. Sections go in
+    BUDGET_PRIORITY order and the most recent snippets first; a snippet that
+    does not fit is dropped and smaller ones may still take its place, and
+    repeated content is only packed once.
+    A snippet costs its body and header, plus the section title for the
+    first one in a section.
+    Returns (selected in stash order, (dropped, cost) pairs, duplicates,
+    tokens used).
+    """
+    candidates: List[Snippet] = [snippet for snippet, _ in store.headers()]
+
+    # Snippets stored before counts were cached are measured from their bodies
+    for snippet in store.load([s.id for s in candidates if s.tokens < 0]):
+        snippet.measure()
+        candidates[snippet.id] = snippet
+
+    used: int = estimate_tokens(f"{DIRECT_PROMPT_TITLE}\n{prompt}") if prompt else 0
+    titles: Dict[str, str] = dict(SECTIONS)
+    opened: Set[str] = set()
+    seen: Set[str] = set()
+    selected: List[Snippet] = []
+    dropped: List[Tuple[Snippet, int]] = []
+    duplicates: List[Snippet] = []
+
+    candidates.sort(key=lambda s: (BUDGET_PRIORITY.index(section_of(s)), -s.created, -s.id))
+    for snippet in candidates:
+        if snippet.digest in seen:
+            duplicates.append(snippet)
+            continue
+        seen.add(snippet.digest)
+
+        section: str = section_of(snippet)
+        cost: int = snippet.tokens + estimate_tokens(snippet.header())
+        if section not in opened:
+            cost += estimate_tokens(titles[section])
+        if used + cost > budget:
+            dropped.append((snippet, cost))
+            continue
+
+        used += cost
+        opened.add(section)
+        selected.append(snippet)
+
+    selected.sort(key=lambda s: s.id)
+    return selected, dropped, duplicates, used
+
+
+def pop_snippets(prompt: Optional[str] = None, budget: Optional[int] = None) -> None:
+    store = open_store()
+    if not store.count():
         print("No snippets to pop.")
         return
 
-    context: List[str] = []
-    task: List[str] = []
-    prompts: List[str] = []
-    generic: List[str] = []
-
-    # classify snippets
-    for snip in snippets:
-        header_end: int = snip.find("\n")
-        header: str = snip[:header_end] if header_end > 0 else snip
-
-        if "Type: context" in header:
-            context.append(snip)
-        elif "Type: task" in header:
-            task.append(snip)
-        elif "Type: prompt" in header:
-            prompts.append(snip)
-        else:
-            generic.append(snip)
-
-    blocks: List[str] = []
-
-    if context:
-        blocks.append("### CONTEXT\n" + "\n\n".join(context))
-    if task:
-        blocks.append("### TASK\n" + "\n\n".join(task))
-    if generic:
-        blocks.append("### MISC\n" + "\n\n".join(generic))
-    if prompts:
-        blocks.append("### PROMPTS\n" + "\n\n".join(prompts))
-    if prompt:
-        blocks.append("### DIRECT PROMPT\n" + prompt)
+    if budget is None:
+        copy_to_clipboard(build_prompt(list(store.snippets()), prompt))
+        print("Structured prompt copied to clipboard.")
+        return
+
+    selected, dropped, duplicates, used = select_within_budget(store, budget, prompt)
 
-    final_text: str = "\n\n".join(blocks)
+    # Only the bodies that made it into the prompt are read
+    bodies: Dict[int, Snippet] = {s.id: s for s in store.load([s.id for s in selected if s.body is None])}
+    snippets: List[Snippet] = [bodies.get(s.id, s) for s in selected]
 
-    copy_to_clipboard(final_text)
-    print("Structured prompt copied to clipboard.")
+    copy_to_clipboard(build_prompt(snippets, prompt))
+    print(f"Structured prompt copied to clipboard: {len(snippets)} of {store.count()} snippets, "
+          f"~{used} of {budget} tokens.")
+
+    if dropped:
+        print(f"Dropped {len(dropped)} snippets over budget:")
+        for snippet, cost in sorted(dropped, key=lambda d: d[0].id):
+            print(f"  [{snippet.id + 1}] ~{cost} tokens  {snippet.header()}")
+    if duplicates:
+        ids: str = ", ".join(str(s.id + 1) for s in sorted(duplicates, key=lambda s: s.id))
+        print(f"Skipped {len(duplicates)} duplicate snippets: {ids}")
 
 
 # ------------------------------------------------------------
@@ -149,12 +323,16 @@ def pop_snippets(prompt: Optional[str] = None) -> None:
 # ------------------------------------------------------------
 
 def clear_stash() -> None:
-    SNIPPET_FILE.unlink(missing_ok=True)
+    store = open_store()
+    SearchIndex(store).clear()
+    store.clear()
     print("Snippet stash cleared.")
 
 
 def show_store_path() -> None:
-    print(f"Snippet stash file: {SNIPPET_FILE.resolve()}")
+    store = open_store()
+    print(f"Snippet stash log: {store.log_path.resolve()}")
+    print(f"Snippet stash index: {store.index_path.resolve()}")
 
 
 # ------------------------------------------------------------
@@ -166,11 +344,17 @@ def show_help() -> None:
     print("Commands:")
     print("  print                 Show all stored snippets")
     print("  pop [prompt]          Build structured prompt")
+    print("    -b, --budget N      Fit the prompt in ~N tokens (newest first, duplicates once)")
+    print("  search QUERY          Ranked full-text search")
+    print("    -t, --type TYPE     Only snippets of this type")
+    print("    -s, --source TEXT   Only snippets whose source contains TEXT")
+    print("    -n, --limit N       Number of results (default 10)")
     print("  clear                 Clear snippet stash")
     print("  store                 Show stash path\n")
     print("When no command is provided, a snippet is added from the clipboard.\n")
     print("Snippet options (these add a snippet):")
-    print("  -f, --file PATH       Read content from file")
+    print("  -f, --file PATH       Read content from file; a directory or glob adds every text file")
+    print("  --max-size BYTES      Skip bulk files larger than this (default 256 KB)")
     print("  -c, --content TEXT    Use TEXT as snippet content")
     print("  -d, --desc TEXT       Add a description")
     print("  -t, --type TYPE       context | task | prompt | generic\n")
@@ -178,7 +362,10 @@ def show_help() -> None:
     print("  snippet                     (from clipboard)")
     print("  snippet -c \"hello world\"")
     print("  snippet -f utils.ts -t context")
+    print("  snippet -f 'src/**/*.py' -t context")
     print("  snippet pop \"Explain this code\"")
+    print("  snippet pop --budget 8000 \"Explain this code\"")
+    print("  snippet search parser -t context")
 
 
 # ------------------------------------------------------------
@@ -209,8 +396,49 @@ def main() -> None:
         return
 
     if command == "pop":
-        prompt = " ".join(argv[2:]) if len(argv) > 2 else None
-        pop_snippets(prompt)
+        words: List[str] = []
+        budget: Optional[int] = None
+
+        i = 2
+        while i < len(argv):
+            if argv[i] in ("-b", "--budget") and i + 1 < len(argv):
+                budget = int(argv[i + 1])
+                i += 2
+                continue
+            words.append(argv[i])
+            i += 1
+
+        pop_snippets(" ".join(words) if words else None, budget)
+        return
+
+    if command == "search":
+        words = []
+        search_type: Optional[str] = None
+        source: Optional[str] = None
+        limit: int = 10
+
+        i = 2
+        while i < len(argv):
+            arg = argv[i]
+            if arg in ("-t", "--type") and i + 1 < len(argv):
+                search_type = argv[i + 1]
+                i += 2
+                continue
+            if arg in ("-s", "--source") and i + 1 < len(argv):
+                source = argv[i + 1]
+                i += 2
+                continue
+            if arg in ("-n", "--limit") and i + 1 < len(argv):
+                limit = int(argv[i + 1])
+                i += 2
+                continue
+            words.append(arg)
+            i += 1
+
+        if not words:
+            print("Usage: snippet search QUERY [-t TYPE] [-s SOURCE] [-n LIMIT]")
+            return
+        search_snippets(" ".join(words), search_type, source, limit)
         return
 
     if command == "clear":
@@ -229,6 +457,7 @@ def main() -> None:
         description: Optional[str] = None
         stype: Optional[str] = None
         direct_content: Optional[str] = None
+        max_size: int = BULK_MAX_FILE_SIZE
 
         i = 1
         while i < len(argv):
@@ -254,6 +483,11 @@ def main() -> None:
                 i += 2
                 continue
 
+            if arg == "--max-size" and i + 1 < len(argv):
+                max_size = int(argv[i + 1])
+                i += 2
+                continue
+
             if arg.startswith("-"):
                 print(f"Unknown option: {arg}")
                 show_help()
@@ -265,6 +499,9 @@ def main() -> None:
         if direct_content is not None:
             content = direct_content
             source = "direct content"
+        elif file_path is not None and is_bulk_path(str(file_path)):
+            add_snippets_bulk(str(file_path), description, stype, max_size)
+            return
         elif file_path is not None:
             if not file_path.exists():
                 print(f"Error: File does not exist: {file_path}")
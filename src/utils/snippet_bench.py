@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Snippet store benchmarks on a synthetic stash
+
+    python -m utils.snippet_bench search [--snippets N]
+    python -m utils.snippet_bench stress [--adds N] [--workers N]
+
+search fills a temporary store with N generated snippets, builds the
+search index, then times single adds (append + incremental index) and
+queries with common, rare and filtered terms.
+
+stress runs N adds (append + index sync, like add_snippet) from parallel
+processes against one store, then checks that every snippet arrived
+intact and was indexed exactly once.
+"""
+
+import argparse
+import itertools
+import multiprocessing
+import random
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from .snippet_search import SearchIndex
+from .snippet_store import Snippet, SnippetStore
+
+TYPES = ["context", "task", "prompt", "generic"]
+
+
+# ------------------------
+# Synthetic stash
+# ------------------------
+def make_vocabulary(size, rng):
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    return ["".join(rng.choice(letters) for _ in range(rng.randint(3, 10))) for _ in range(size)]
+
+
+def zipf_weights(vocabulary):
+    """Cumulative Zipf-like word frequencies, like real text and code"""
+    return list(itertools.accumulate(1 / (rank + 1) for rank in range(len(vocabulary))))
+
+
+def make_snippets(count, rng, vocabulary, cum_weights):
+    snippets = []
+    for i in range(count):
+        words = rng.choices(vocabulary, cum_weights=cum_weights, k=rng.randint(20, 200))
+        snippets.append(Snippet(TYPES[i % len(TYPES)], f"src/module{i % 500}.py", body=" ".join(words)))
+    return snippets
+
+
+# ------------------------
+# Benchmark
+# ------------------------
+def timed(label, func, repeat=1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    elapsed = (time.perf_counter() - start) / repeat
+    print(f"  {label:<40} {elapsed * 1000:>10.2f} ms")
+    return result
+
+
+def bench_search(count):
+    rng = random.Random(42)
+    vocabulary = make_vocabulary(50_000, rng)
+    tmp = Path(tempfile.mkdtemp(prefix="snippet_bench_"))
+    try:
+        store = SnippetStore(tmp / "snippets")
+        start = time.perf_counter()
+        cum_weights = zipf_weights(vocabulary)
+        store.append_many(make_snippets(count, rng, vocabulary, cum_weights))
+        print(f"Stored {count} snippets in {time.perf_counter() - start:.1f}s")
+
+        index = SearchIndex(store)
+        start = time.perf_counter()
+        index.sync()
+        print(f"Indexed in {time.perf_counter() - start:.1f}s, "
+              f"index {index.path.stat().st_size / 1e6:.0f} MB\n")
+
+        def add_one():
+            store.append_many(make_snippets(1, rng, vocabulary, cum_weights))
+            index.sync()
+
+        timed("add one snippet (append + index)", add_one, repeat=20)
+
+        common, mid, rare = vocabulary[0], vocabulary[100], vocabulary[20_000]
+        queries = [
+            ("rare term", rare, None, None),
+            ("mid-frequency term", mid, None, None),
+            ("rare + mid terms", f"{rare} {mid}", None, None),
+            ("common term (in most snippets)", common, None, None),
+            ("rare + common terms", f"{rare} {common}", None, None),
+            ("mid + common terms", f"{mid} {common}", None, None),
+            ("mid term, --type task", mid, "task", None),
+            ("mid term, --source module7", mid, None, "module7"),
+        ]
+        for label, query, stype, source in queries:
+            hits = timed(label, lambda: index.search(query, stype, source), repeat=20)
+            if not hits:
+                print(f"    (no results for {query!r})")
+        index.close()
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def stress_add(args):
+    base, worker, n = args
+    store = SnippetStore(base)
+    index = SearchIndex(store)
+    for i in range(n):
+        store.append(Snippet("context", f"worker{worker}", f"add {i}", time.time(),
+                             f"stress marker w{worker}n{i} " + "payload " * (i % 50)))
+        index.sync()
+    index.close()
+
+
+def bench_stress(adds, workers):
+    tmp = Path(tempfile.mkdtemp(prefix="snippet_stress_"))
+    try:
+        base = tmp / "snippets"
+        per_worker = [adds // workers + (1 if w < adds % workers else 0) for w in range(workers)]
+        print(f"{adds} adds from {workers} processes")
+
+        start = time.perf_counter()
+        with multiprocessing.Pool(workers) as pool:
+            pool.map(stress_add, [(base, w, n) for w, n in enumerate(per_worker)], chunksize=1)
+        elapsed = time.perf_counter() - start
+        print(f"  {elapsed:.2f}s, {adds / elapsed:.0f} adds/s")
+
+        store = SnippetStore(base)
+        expected = {f"w{w}n{i}" for w, n in enumerate(per_worker) for i in range(n)}
+        found = [snippet.body.split()[2] for snippet in store.snippets()]
+        index = SearchIndex(store)
+        indexed = index.db.execute("SELECT COUNT(*) FROM docs").fetchone()[0]
+        df = index.db.execute("SELECT df FROM terms WHERE term = 'stress'").fetchone()[0]
+        index.close()
+
+        print(f"  stored {len(found)}, unique {len(set(found))}, missing {len(expected - set(found))}")
+        print(f"  indexed {indexed}, df('stress') {df}")
+        ok = sorted(found) == sorted(expected) and indexed == df == adds
+        print("  OK: nothing lost or duplicated" if ok else "  FAILED")
+        return ok
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="snippet store benchmarks")
+    sub = parser.add_subparsers(dest="bench", required=True)
+    search = sub.add_parser("search", help="Search index build, incremental add and query latency")
+    search.add_argument("--snippets", type=int, default=100_000)
+    stress = sub.add_parser("stress", help="Parallel adds against one store, checking nothing is lost")
+    stress.add_argument("--adds", type=int, default=500)
+    stress.add_argument("--workers", type=int, default=32)
+    args = parser.parse_args()
+
+    if args.bench == "search":
+        bench_search(args.snippets)
+    elif args.bench == "stress" and not bench_stress(args.adds, args.workers):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
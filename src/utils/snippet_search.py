@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Full-text search over the snippet store.
+
+An inverted index (term -> snippet, term frequency) is kept in an SQLite
+file beside the store. It is brought up to date incrementally: sync()
+indexes only the snippets appended since the last sync, which add_snippet
+does after every add. Queries are ranked with BM25, computed in SQL over
+the postings of the query terms only; postings carry their snippet's
+length so unfiltered queries never touch the docs table. When a query mixes
+rare and common terms, only snippets holding a rare term are scored, so a
+word found in most snippets does not make every query scan its postings.
+"""
+from __future__ import annotations
+import math
+import re
+import sqlite3
+from collections import Counter
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+from .snippet_store import SnippetStore
+
+# ------------------------------------------------------------
+# Constants
+# ------------------------------------------------------------
+
+BM25_K1: float = 1.2
+BM25_B: float = 0.75
+# Terms in more than this share of snippets don't pick candidates when the
+# query has a rarer term; they still add to the candidates' scores
+COMMON_TERM_RATIO: float = 0.1
+TOKEN_RE = re.compile(r"\w\w+")
+
+SCHEMA: str = """
+PRAGMA journal_mode = WAL;
+CREATE TABLE IF NOT EXISTS docs (
+    id INTEGER PRIMARY KEY,
+    type TEXT NOT NULL,
+    source TEXT NOT NULL,
+    length INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS postings (
+    term TEXT NOT NULL,
+    doc INTEGER NOT NULL,
+    tf INTEGER NOT NULL,
+    length INTEGER NOT NULL,
+    PRIMARY KEY (term, doc)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS terms (
+    term TEXT PRIMARY KEY,
+    df INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS stats (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_RE.findall(text.lower())
+
+
+# ------------------------------------------------------------
+# Index
+# ------------------------------------------------------------
+
+class SearchIndex:
+    def __init__(self, store: SnippetStore) -> None:
+        self.store: SnippetStore = store
+        self.path: Path = store.log_path.with_suffix(".search.db")
+        # Transactions are managed explicitly (see sync); wait for other writers
+        self.db: sqlite3.Connection = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+        self.db.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.db.close()
+
+    def stat(self, key: str) -> int:
+        row = self.db.execute("SELECT value FROM stats WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else 0
+
+    def sync(self) -> int:
+        """
+        Index the snippets added to the store since the last sync, returns
+        how many. The whole sync is one write transaction, so concurrent
+        syncs from other processes queue up instead of indexing the same
+        snippets twice.
+        """
+        if self.stat("docs") == self.store.count():
+            return 0
+
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            added: int = self._sync()
+            self.db.execute("COMMIT")
+        except BaseException:
+            self.db.execute("ROLLBACK")
+            raise
+        return added
+
+    def _sync(self) -> int:
+        indexed: int = self.stat("docs")
+        total: int = self.store.count()
+        if indexed > total:
+            # The store was cleared behind our back; start over
+            for table in ("docs", "postings", "terms", "stats"):
+                self.db.execute(f"DELETE FROM {table}")
+            indexed = 0
+        if indexed == total:
+            return 0
+
+        total_length: int = self.stat("length")
+        docs: List[Tuple[int, str, str, int]] = []
+        postings: List[Tuple[str, int, int, int]] = []
+        dfs: Counter = Counter()
+
+        for snippet in self.store.snippets(indexed, total):
+            counts: Counter = Counter(tokenize(snippet.source))
+            counts.update(tokenize(snippet.description))
+            counts.update(tokenize(snippet.body or ""))
+            length: int = sum(counts.values())
+            total_length += length
+
+            docs.append((snippet.id, snippet.stype, snippet.source, length))
+            postings.extend((term, snippet.id, tf, length) for term, tf in counts.items())
+            dfs.update(counts.keys())
+
+        # Inserting in key order keeps B-tree writes sequential on big syncs
+        postings.sort()
+        self.db.executemany("INSERT OR REPLACE INTO docs VALUES (?, ?, ?, ?)", docs)
+        self.db.executemany("INSERT OR REPLACE INTO postings VALUES (?, ?, ?, ?)", postings)
+        self.db.executemany("INSERT INTO terms VALUES (?, ?) ON CONFLICT(term) DO UPDATE SET df = df + excluded.df",
+                            dfs.items())
+        self.db.executemany("INSERT OR REPLACE INTO stats VALUES (?, ?)",
+                            (("docs", total), ("length", total_length)))
+        return total - indexed
+
+    def search(
+        self,
+        query: str,
+        stype: Optional[str] = None,
+        source: Optional[str] = None,
+        limit: int = 10
+    ) -> List[Tuple[int, float]]:
+        """(snippet id, BM25 score) pairs, best first"""
+        terms: List[str] = sorted(set(tokenize(query)))
+        docs: int = self.stat("docs")
+        if not terms or not docs:
+            return []
+        avgdl: float = self.stat("length") / docs or 1.0
+
+        placeholders: str = ", ".join("?" for _ in terms)
+        dfs: Iterable[Tuple[str, int]] = self.db.execute(
+            f"SELECT term, df FROM terms WHERE term IN ({placeholders})", terms).fetchall()
+        weights: List[Tuple[str, float]] = [
+            (term, math.log(1 + (docs - df + 0.5) / (df + 0.5))) for term, df in dfs
+        ]
+        if not weights:
+            return []
+
+        rare: List[str] = [term for term, df in dfs if df <= docs * COMMON_TERM_RATIO]
+        candidates: bool = 0 < len(rare) < len(weights)
+
+        filters: List[str] = []
+        params: List[object] = [value for weight in weights for value in weight]
+        if candidates:
+            params.extend(rare)
+        if stype:
+            filters.append("d.type = ?")
+            params.append(stype)
+        if source:
+            filters.append("d.source LIKE ?")
+            params.append(f"%{source}%")
+        join: str = "JOIN docs d ON d.id = p.doc" if filters else ""
+        where: str = f"WHERE {' AND '.join(filters)}" if filters else ""
+        params.append(limit)
+
+        values: str = ", ".join("(?, ?)" for _ in weights)
+        # Candidates first (CROSS JOIN fixes the order), then one postings lookup per term
+        source_rows: str = "q JOIN postings p ON p.term = q.term"
+        candidate_cte: str = ""
+        if candidates:
+            candidate_cte = (f", c(doc) AS (SELECT DISTINCT doc FROM postings "
+                             f"WHERE term IN ({', '.join('?' for _ in rare)}))")
+            source_rows = "c CROSS JOIN q CROSS JOIN postings p ON p.term = q.term AND p.doc = c.doc"
+        sql: str = f"""
+            WITH q(term, idf) AS (VALUES {values}){candidate_cte}
+            SELECT p.doc, SUM(q.idf * p.tf * {BM25_K1 + 1}
+                              / (p.tf + {BM25_K1} * (1 - {BM25_B} + {BM25_B} * p.length / {avgdl}))) AS score
+            FROM {source_rows}
+            {join}
+            {where}
+            GROUP BY p.doc
+            ORDER BY score DESC
+            LIMIT ?
+        """
+        return self.db.execute(sql, params).fetchall()
+
+    def clear(self) -> None:
+        self.close()
+        self.path.unlink(missing_ok=True)
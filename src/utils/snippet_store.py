@@ -0,0 +1,442 @@
+#!/usr/bin/env python3
+"""
+Append-only snippet store.
+
+Snippets live in a binary log of length-prefixed records
+
+    LOG_MAGIC, then per snippet: <u32 header length><u32 body length><header><body>
+
+plus an index file with one fixed-width entry per snippet
+
+    <u64 record offset><u32 header length><u32 body length>
+
+Adding a snippet appends one record and one index entry, so it costs the
+same however large the stash is, and content can never be mistaken for a
+record boundary. Listing reads the index and then only the header (and a
+short body prefix for previews) of each record.
+
+Writers (append, migration, clear) hold an exclusive lock on a .lock file
+beside the store, so concurrent snippet commands never interleave their
+appends. The index entry is the commit point: the record is written and
+synced first, and readers only follow index entries, so they never see a
+partial snippet. Whole-store rewrites go to temporary files that are
+renamed into place.
+
+Headers are JSON objects decoded straight into Snippet records, so no
+command ever re-parses a formatted header line. Older stashes (the
+SEPARATOR-joined text file and v1 logs with '--- ... ---' header lines)
+are migrated once, on first use.
+"""
+from __future__ import annotations
+import hashlib
+import json
+import os
+import re
+import struct
+from pathlib import Path
+from types import TracebackType
+from typing import Any, BinaryIO, Dict, Iterator, List, NamedTuple, Optional, Tuple, Type
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# ------------------------------------------------------------
+# Constants
+# ------------------------------------------------------------
+
+STORE_BASE: Path = Path("/tmp/all_snippets")
+LEGACY_SNIPPET_FILE: Path = Path("/tmp/all_snippets.txt")
+LEGACY_SEPARATOR: str = "\n\n===SNIPPET===\n\n"
+LEGACY_HEADER = re.compile(
+    r"--- (?:Source: (?P<source>.*?) \| )?(?:Description: (?P<description>.*?) \| )?Type: (?P<type>\w+) ---\Z",
+    re.DOTALL
+)
+
+LOG_MAGIC: bytes = b"SNIPLOG2"
+LOG_MAGIC_V1: bytes = b"SNIPLOG1"
+RECORD_PREFIX: struct.Struct = struct.Struct("<II")
+INDEX_ENTRY: struct.Struct = struct.Struct("<QII")
+TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+TOKEN_CHARS: int = 4
+
+
+class IndexEntry(NamedTuple):
+    offset: int
+    header_len: int
+    body_len: int
+
+
+# ------------------------------------------------------------
+# Records
+# ------------------------------------------------------------
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough BPE token count without a tokenizer: every punctuation mark is a
+    token and words cost one token per TOKEN_CHARS characters.
+    """
+    return sum((len(piece) + TOKEN_CHARS - 1) // TOKEN_CHARS for piece in TOKEN_RE.findall(text))
+
+
+def content_digest(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
+
+
+class Snippet:
+    """
+    One stored snippet; body is None when only the header was read.
+    tokens and digest describe the body and are cached in the header
+    (-1 and "" for snippets stored before they existed).
+    """
+    __slots__ = ("id", "stype", "source", "description", "created", "body", "tokens", "digest")
+
+    def __init__(
+        self,
+        stype: str = "generic",
+        source: str = "",
+        description: str = "",
+        created: float = 0.0,
+        body: Optional[str] = None,
+        id: int = -1,
+        tokens: int = -1,
+        digest: str = ""
+    ) -> None:
+        self.id: int = id
+        self.stype: str = stype
+        self.source: str = source
+        self.description: str = description
+        self.created: float = created
+        self.body: Optional[str] = body
+        self.tokens: int = tokens
+        self.digest: str = digest
+
+    def header(self) -> str:
+        """The header line used in listings and prompts"""
+        meta: List[str] = []
+        if self.source:
+            meta.append(f"Source: {self.source}")
+        if self.description:
+            meta.append(f"Description: {self.description}")
+        meta.append(f"Type: {self.stype}")
+        return f"--- {' | '.join(meta)} ---"
+
+    def measure(self) -> None:
+        """Fill in tokens and digest from the body"""
+        body: str = self.body or ""
+        self.tokens = estimate_tokens(body)
+        self.digest = content_digest(body)
+
+    def encode_header(self) -> bytes:
+        if self.tokens < 0 and self.body is not None:
+            self.measure()
+        data: Dict[str, Any] = {"type": self.stype, "source": self.source,
+                                "description": self.description, "created": self.created,
+                                "tokens": self.tokens, "digest": self.digest}
+        return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    @classmethod
+    def decode(cls, id: int, header: bytes, body: Optional[str] = None) -> Snippet:
+        data: Dict[str, Any] = json.loads(header)
+        return cls(data["type"], data["source"], data["description"], data["created"], body, id,
+                   data.get("tokens", -1), data.get("digest", ""))
+
+    @classmethod
+    def from_legacy(cls, header: str, body: str) -> Snippet:
+        """Recover the fields of a '--- Source: x | Description: y | Type: z ---' header"""
+        m = LEGACY_HEADER.match(header.strip())
+        if m is None:
+            return cls(description=header.strip(" -"), body=body)
+        return cls(m["type"], m["source"] or "", m["description"] or "", body=body)
+
+
+# ------------------------------------------------------------
+# Locking
+# ------------------------------------------------------------
+
+class StoreLock:
+    """Exclusive inter-process lock on a lock file, held for a with block"""
+
+    def __init__(self, path: Path) -> None:
+        self.path: Path = path
+        self.file: Optional[BinaryIO] = None
+
+    def __enter__(self) -> StoreLock:
+        self.file = open(self.path, "a+b")
+        if fcntl is not None:
+            fcntl.flock(self.file.fileno(), fcntl.LOCK_EX)
+        else:
+            while True:
+                try:
+                    self.file.seek(0)
+                    msvcrt.locking(self.file.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc: Optional[BaseException],
+        tb: Optional[TracebackType]
+    ) -> None:
+        assert self.file is not None
+        if fcntl is not None:
+            fcntl.flock(self.file.fileno(), fcntl.LOCK_UN)
+        else:
+            self.file.seek(0)
+            msvcrt.locking(self.file.fileno(), msvcrt.LK_UNLCK, 1)
+        self.file.close()
+        self.file = None
+
+
+# ------------------------------------------------------------
+# Store
+# ------------------------------------------------------------
+
+class SnippetStore:
+    def __init__(self, base: Optional[Path] = None) -> None:
+        base = base or STORE_BASE
+        self.log_path: Path = base.with_suffix(".log")
+        self.index_path: Path = base.with_suffix(".idx")
+        self.lock_path: Path = base.with_suffix(".lock")
+
+    def lock(self) -> StoreLock:
+        return StoreLock(self.lock_path)
+
+    def exists(self) -> bool:
+        return self.index_path.exists()
+
+    # ------------------- Index ---------------------------------
+
+    def entries(self, start: int = 0, stop: Optional[int] = None) -> List[IndexEntry]:
+        """
+        Index entries start..stop (default: all), read without touching the
+        rest of the index. A torn trailing entry from a crash is ignored.
+        """
+        try:
+            with open(self.index_path, "rb") as idx:
+                idx.seek(start * INDEX_ENTRY.size)
+                size: int = -1 if stop is None else max(0, stop - start) * INDEX_ENTRY.size
+                data: bytes = idx.read(size)
+        except FileNotFoundError:
+            return []
+        usable: int = len(data) - len(data) % INDEX_ENTRY.size
+        return [IndexEntry(*fields) for fields in INDEX_ENTRY.iter_unpack(data[:usable])]
+
+    def count(self) -> int:
+        try:
+            return self.index_path.stat().st_size // INDEX_ENTRY.size
+        except FileNotFoundError:
+            return 0
+
+    # ------------------- Writing -------------------------------
+
+    def append(self, snippet: Snippet) -> int:
+        """Append one snippet, returns the new snippet count"""
+        return self.append_many([snippet])
+
+    def append_many(self, snippets: List[Snippet]) -> int:
+        """Append snippets with one write to the log and one to the index"""
+        # Encode before taking the lock so it is held only for the I/O
+        for snippet in snippets:
+            if snippet.tokens < 0 and snippet.body is not None:
+                snippet.measure()
+        with self.lock():
+            return self._append(snippets)
+
+    def _append(self, snippets: List[Snippet]) -> int:
+        """append_many for callers already holding the lock"""
+        with open(self.log_path, "ab") as log:
+            records, index = encode_records(snippets, log.tell())
+            log.write(records)
+            log.flush()
+            os.fsync(log.fileno())
+
+        with open(self.index_path, "ab") as idx:
+            # Drop a torn trailing entry left by a crash, or every later entry is misaligned
+            torn: int = idx.tell() % INDEX_ENTRY.size
+            if torn:
+                idx.truncate(idx.tell() - torn)
+            idx.write(index)
+            idx.flush()
+            os.fsync(idx.fileno())
+
+        return self.count()
+
+    def clear(self) -> None:
+        with self.lock():
+            self.index_path.unlink(missing_ok=True)
+            self.log_path.unlink(missing_ok=True)
+
+    # ------------------- Reading -------------------------------
+
+    def _open_log(self) -> BinaryIO:
+        log: BinaryIO = open(self.log_path, "rb")
+        if log.read(len(LOG_MAGIC)) != LOG_MAGIC:
+            log.close()
+            raise Exception(f"Not a snippet log: {self.log_path}")
+        return log
+
+    def headers(self, preview_bytes: int = 0, ids: Optional[List[int]] = None) -> Iterator[Tuple[Snippet, str]]:
+        """
+        Yield (snippet without body, body prefix) for the given ids (default:
+        all), reading only the header and at most preview_bytes of each body.
+        """
+        if ids is None:
+            entries: List[Tuple[int, IndexEntry]] = list(enumerate(self.entries()))
+        else:
+            entries = [(i, entry) for i in ids for entry in self.entries(i, i + 1)]
+        if not entries:
+            return
+        with self._open_log() as log:
+            for i, entry in entries:
+                log.seek(entry.offset + RECORD_PREFIX.size)
+                header: bytes = log.read(entry.header_len)
+                prefix: bytes = log.read(min(preview_bytes, entry.body_len))
+                yield Snippet.decode(i, header), prefix.decode("utf-8", errors="ignore")
+
+    def load(self, ids: List[int]) -> List[Snippet]:
+        """The snippets with the given ids, with bodies, in the order given"""
+        if not ids:
+            return []
+        entries: List[IndexEntry] = self.entries()
+        loaded: List[Snippet] = []
+        with self._open_log() as log:
+            for i in ids:
+                entry: IndexEntry = entries[i]
+                log.seek(entry.offset + RECORD_PREFIX.size)
+                data: bytes = log.read(entry.header_len + entry.body_len)
+                loaded.append(Snippet.decode(i, data[:entry.header_len], data[entry.header_len:].decode("utf-8")))
+        return loaded
+
+    def snippets(self, start: int = 0, stop: Optional[int] = None) -> Iterator[Snippet]:
+        """Yield snippets start..stop (default: all) with their bodies"""
+        entries: List[IndexEntry] = self.entries(start, stop)
+        if not entries:
+            return
+        with self._open_log() as log:
+            for i, entry in enumerate(entries, start=start):
+                log.seek(entry.offset + RECORD_PREFIX.size)
+                data: bytes = log.read(entry.header_len + entry.body_len)
+                yield Snippet.decode(i, data[:entry.header_len], data[entry.header_len:].decode("utf-8"))
+
+    # ------------------- Migration -----------------------------
+
+    def log_version(self) -> Optional[bytes]:
+        try:
+            with open(self.log_path, "rb") as log:
+                return log.read(len(LOG_MAGIC))
+        except FileNotFoundError:
+            return None
+
+    def read_v1(self) -> List[Snippet]:
+        """Every snippet of a v1 log, whose headers are '--- ... ---' lines"""
+        snippets: List[Snippet] = []
+        with open(self.log_path, "rb") as log:
+            for entry in self.entries():
+                log.seek(entry.offset + RECORD_PREFIX.size)
+                data: bytes = log.read(entry.header_len + entry.body_len)
+                snippets.append(Snippet.from_legacy(data[:entry.header_len].decode("utf-8"),
+                                                    data[entry.header_len:].decode("utf-8")))
+        return snippets
+
+    def rewrite(self, snippets: List[Snippet]) -> None:
+        """
+        Replace the whole store. Both files are written under temporary
+        names first; the log is renamed before the index, and an index left
+        behind by an interrupted rewrite is put in place by recover().
+        """
+        records, index = encode_records(snippets, 0)
+        log_tmp: Path = self.log_path.with_suffix(".log.tmp")
+        index_tmp: Path = self.index_path.with_suffix(".idx.tmp")
+        for path, data in ((log_tmp, records), (index_tmp, index)):
+            with open(path, "wb") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(log_tmp, self.log_path)
+        os.replace(index_tmp, self.index_path)
+
+    def recover(self) -> None:
+        index_tmp: Path = self.index_path.with_suffix(".idx.tmp")
+        if index_tmp.exists() and self.log_version() == LOG_MAGIC:
+            os.replace(index_tmp, self.index_path)
+
+    def needs_migration(self, legacy_file: Path) -> bool:
+        if self.index_path.with_suffix(".idx.tmp").exists():
+            return True
+        if self.log_version() == LOG_MAGIC_V1:
+            return True
+        return not self.exists() and legacy_file.exists()
+
+    def migrate(self, legacy_file: Optional[Path] = None) -> int:
+        """
+        One-time upgrade of older stashes: a v1 log is rewritten with JSON
+        headers, and the SEPARATOR-joined text stash is imported (then
+        renamed to *.migrated so it is never imported twice). Returns the
+        number of snippets migrated.
+        """
+        legacy_file = legacy_file or LEGACY_SNIPPET_FILE
+        if not self.needs_migration(legacy_file):
+            return 0
+
+        with self.lock():
+            # Another process may have migrated while we waited
+            return self._migrate(legacy_file)
+
+    def _migrate(self, legacy_file: Path) -> int:
+        self.recover()
+
+        if self.log_version() == LOG_MAGIC_V1:
+            snippets: List[Snippet] = self.read_v1()
+            self.rewrite(snippets)
+            return len(snippets)
+
+        if self.exists() or not legacy_file.exists():
+            return 0
+
+        content: str = legacy_file.read_text(encoding="utf-8")
+        snippets = []
+        for snip in content.split(LEGACY_SEPARATOR):
+            if not snip.strip():
+                continue
+            header, _, body = snip.partition("\n")
+            snippets.append(Snippet.from_legacy(header, body))
+
+        if snippets:
+            self._append(snippets)
+        legacy_file.rename(legacy_file.with_suffix(".txt.migrated"))
+        return len(snippets)
+
+
+def encode_records(snippets: List[Snippet], offset: int) -> Tuple[bytes, bytes]:
+    """Log bytes and index bytes for snippets written at offset of the log"""
+    records: List[bytes] = []
+    index: List[bytes] = []
+    if offset == 0:
+        records.append(LOG_MAGIC)
+        offset = len(LOG_MAGIC)
+
+    for snippet in snippets:
+        header_bytes: bytes = snippet.encode_header()
+        body_bytes: bytes = (snippet.body or "").encode("utf-8")
+        records.append(RECORD_PREFIX.pack(len(header_bytes), len(body_bytes)))
+        records.append(header_bytes)
+        records.append(body_bytes)
+        index.append(INDEX_ENTRY.pack(offset, len(header_bytes), len(body_bytes)))
+        offset += RECORD_PREFIX.size + len(header_bytes) + len(body_bytes)
+
+    return b"".join(records), b"".join(index)
+
+
+def open_store(base: Optional[Path] = None) -> SnippetStore:
+    """The snippet store, migrating older stash formats on first use"""
+    store: SnippetStore = SnippetStore(base)
+    migrated: int = store.migrate()
+    if migrated:
+        print(f"Migrated {migrated} snippets to the current stash format")
+    return store
@@ -1,11 +1,30 @@
 import argparse
+import hashlib
+import heapq
 import json
 import os
+import stat
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from .clipboard_utils import copy_to_clipboard
+
+from .gitignore import GitignoreStack
 
 
 CONFIG_FILE = "/home/atari-monk/atari-monk/project/script/src/utils/tree.json"
+CACHE_DIR = Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")) / "fstree"
+CACHE_VERSION = 2
+# A listing is only cached once its directory's mtime is this much older
+# than the scan: entries added in the same timestamp tick (or within NFS/SMB
+# mtime granularity) leave the mtime unchanged ("racily clean", as in git)
+CACHE_RACY_NS = 2_000_000_000
+# Cache files unused for this long are removed, then the oldest until the
+# directory fits in CACHE_MAX_BYTES (one file per distinct root)
+CACHE_MAX_AGE = 30 * 24 * 3600
+CACHE_MAX_BYTES = 64 * 1024 * 1024
+BAR_WIDTH = 20
 
 # Default config (used if config.json is missing)
 config = {
@@ -33,68 +52,502 @@ def load_config():
         config["ignore"]["folders"] = ignore.get("folders", [])
         config["ignore"]["files"] = ignore.get("files", [])
 
-        print("Loaded config.json\n")
+        print("Loaded config.json\n", file=sys.stderr)
 
     except Exception as e:
-        print(f"Error loading config.json: {e}")
+        print(f"Error loading config.json: {e}", file=sys.stderr)
 
 
-def should_ignore(path: Path):
-    name = path.name
-    if path.is_dir():
+def should_ignore(name, is_dir):
+    if is_dir:
         return name in config["ignore"]["folders"]
     return name in config["ignore"]["files"]
 
 
+# ------------------------
+# Directory listing
+# ------------------------
+def scan_dir(path):
+    """
+    List a directory with os.scandir as (name, is_dir, is_file) tuples.
+    DirEntry type info usually comes from the listing itself, so this
+    avoids the per-entry stat calls of Path.is_dir()/is_file().
+    """
+    entries = []
+    with os.scandir(path) as it:
+        for entry in it:
+            try:
+                entries.append((entry.name, entry.is_dir(), entry.is_file()))
+            except OSError:
+                entries.append((entry.name, False, False))
+    return entries
+
+
+def encode_listing(mtime, entries):
+    """Compact cache record: names joined by NUL plus one type flag per entry"""
+    names = "\0".join(name for name, _, _ in entries)
+    flags = "".join("d" if is_dir else "f" if is_file else "o" for _, is_dir, is_file in entries)
+    return [mtime, names, flags]
+
+
+def decode_listing(record):
+    if not record[2]:
+        return []
+    return [
+        (name, flag == "d", flag == "f")
+        for name, flag in zip(record[1].split("\0"), record[2])
+    ]
+
+
+class DirCache:
+    """
+    On-disk cache of directory listings keyed by directory path and mtime.
+    A directory's mtime changes whenever entries are added, removed or
+    renamed, so unchanged directories are served from the cache with a
+    single stat instead of a full listing. Directories modified within
+    CACHE_RACY_NS of the scan are listed but not cached.
+    On a local disk a stat costs about as much as a scandir, so the cache
+    is opt-in (fstree --cache), meant for mounts where listings are slow.
+    """
+
+    def __init__(self, root):
+        key = hashlib.sha1(str(root).encode("utf-8")).hexdigest()[:16]
+        self.path = CACHE_DIR / f"{key}.json"
+        self.dirs = {}
+        self.visited = {}
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.loads(f.read())
+        except (OSError, ValueError):
+            return
+        if data.get("version") == CACHE_VERSION:
+            self.dirs = data.get("dirs", {})
+
+    def save(self, complete):
+        """
+        Write the cache back. A complete (unlimited depth) walk replaces it,
+        dropping directories that no longer exist; a depth-limited walk
+        merges into it so deeper listings are kept. Nothing is written when
+        every listing came from the cache.
+        """
+        if self.misses == 0 and (not complete or len(self.visited) == len(self.dirs)):
+            return
+
+        dirs = self.visited if complete else {**self.dirs, **self.visited}
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(json.dumps({"version": CACHE_VERSION, "dirs": dirs}, separators=(",", ":")))
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"Could not write tree cache: {e}", file=sys.stderr)
+        prune_cache_dir(keep=self.path)
+
+    def listing(self, path):
+        key = str(path)
+        mtime = os.stat(path).st_mtime_ns
+        record = self.dirs.get(key)
+
+        hit = record is not None and record[0] == mtime
+        racy = False
+        if not hit:
+            scanned_at = time.time_ns()
+            record = encode_listing(mtime, scan_dir(path))
+            racy = scanned_at - mtime < CACHE_RACY_NS
+
+        with self.lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+            if not racy:
+                self.visited[key] = record
+        return decode_listing(record)
+
+
+def prune_cache_dir(keep):
+    """Drop cache files older than CACHE_MAX_AGE, then the oldest until under CACHE_MAX_BYTES"""
+    try:
+        files = []
+        for entry in os.scandir(CACHE_DIR):
+            if entry.name.endswith(".json") and entry.path != str(keep):
+                st = entry.stat()
+                files.append((st.st_mtime, st.st_size, entry.path))
+        total = sum(size for _, size, _ in files) + (keep.stat().st_size if keep.exists() else 0)
+        now = time.time()
+        for mtime, size, path in sorted(files):
+            if now - mtime > CACHE_MAX_AGE or total > CACHE_MAX_BYTES:
+                os.remove(path)
+                total -= size
+    except OSError:
+        pass
+
+
+def filter_entries(path, entries, gitignore=None):
+    """
+    Drop ignored entries. With a GitignoreStack, the directory's own
+    .gitignore is stacked on it; returns (entries, stack for this directory).
+    """
+    entries = [e for e in entries if not should_ignore(e[0], e[1])]
+    if gitignore is not None:
+        gitignore = gitignore.enter(path, [e[0] for e in entries])
+        if gitignore.rules:
+            entries = [e for e in entries if not gitignore.ignored(os.path.join(path, e[0]), e[1])]
+    return entries, gitignore
+
+
+def list_dir(path, cache=None, gitignore=None):
+    entries = cache.listing(path) if cache is not None else scan_dir(path)
+    items, gitignore = filter_entries(path, entries, gitignore)
+    items.sort(key=lambda e: (e[2], e[0].lower()))
+    return items, gitignore
+
+
 # ------------------------
 # Tree logic
 # ------------------------
-def build_tree(path, prefix="", level=0, max_level=None):
+def build_tree(path, prefix="", level=0, max_level=None, cache=None, pool=None, pending=None,
+               gitignore=None):
+    """
+    Yield the tree lines below path as they are discovered. Only the
+    listings on the current path are held, so memory grows with depth,
+    not with the size of the tree. A DirCache is the exception: it loads
+    the previous tree and keeps a record per directory visited to write
+    back.
+
+    With a thread pool, the listings of all subdirectories are submitted
+    as soon as their parent is listed, so sibling directories are listed
+    concurrently while rendering stays depth-first and ordered.
+    pending is this directory's already submitted listing. gitignore is the
+    parent's GitignoreStack; ignored directories are never listed.
+    """
     if max_level is not None and level >= max_level:
-        return []
+        return
 
     try:
-        items = [
-            p for p in path.iterdir()
-            if not should_ignore(p)
-        ]
+        items, gitignore = pending.result() if pending is not None else list_dir(path, cache, gitignore)
     except PermissionError:
-        return [f"{prefix}└── [Permission denied]"]
+        yield f"{prefix}└── [Permission denied]"
+        return
 
-    items.sort(key=lambda p: (p.is_file(), p.name.lower()))
-    lines = []
+    children = {}
+    if pool is not None and (max_level is None or level + 1 < max_level):
+        for name, is_dir, _ in items:
+            if is_dir:
+                children[name] = pool.submit(list_dir, os.path.join(path, name), cache, gitignore)
 
-    for i, item in enumerate(items):
+    for i, (name, is_dir, _) in enumerate(items):
         last = i == len(items) - 1
         connector = "└── " if last else "├── "
-        lines.append(f"{prefix}{connector}{item.name}{'/' if item.is_dir() else ''}")
+        yield f"{prefix}{connector}{name}{'/' if is_dir else ''}"
 
-        if item.is_dir():
+        if is_dir:
             extension = "    " if last else "│   "
-            lines.extend(
-                build_tree(
-                    item,
-                    prefix + extension,
-                    level + 1,
-                    max_level
-                )
+            yield from build_tree(
+                os.path.join(path, name),
+                prefix + extension,
+                level + 1,
+                max_level,
+                cache,
+                pool,
+                children.pop(name, None),
+                gitignore
             )
 
-    return lines
+
+def iter_tree(path, max_level=None, use_cache=False, jobs=1, gitignore=False):
+    """
+    Stream the full tree output line by line, root line first.
+    With gitignore, .gitignore files at every level are honoured.
+    """
+    path = Path(path).resolve()
+
+    if not path.exists():
+        yield f"Error: {path} does not exist"
+        return
+
+    if path.is_file():
+        yield path.name
+        return
+
+    cache = None
+    if use_cache:
+        cache = DirCache(path)
+        cache.load()
+
+    stack = GitignoreStack.for_root(str(path)) if gitignore else None
+
+    yield f"{path.name}/"
+    if jobs > 1:
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            yield from build_tree(str(path), max_level=max_level, cache=cache, pool=pool, gitignore=stack)
+    else:
+        yield from build_tree(str(path), max_level=max_level, cache=cache, gitignore=stack)
+
+    if cache is not None:
+        cache.save(complete=max_level is None)
+
+
+def generate_tree(path, max_level=None, use_cache=False, jobs=1, gitignore=False):
+    return "\n".join(iter_tree(path, max_level, use_cache, jobs, gitignore))
+
+
+# ------------------------
+# Size aggregation
+# ------------------------
+class SizeNode:
+    __slots__ = ("name", "is_dir", "size", "files", "children", "denied")
+
+    def __init__(self, name, is_dir, size=0, files=0):
+        self.name = name
+        self.is_dir = is_dir
+        self.size = size
+        self.files = files
+        self.children = []
+        self.denied = False
+
+
+def scan_dir_sizes(path):
+    """
+    Like scan_dir, plus each file's size from the same scandir pass.
+    Symlinks are not followed: like du, they are zero-size entries, so a
+    linked directory is not counted twice and link loops end the walk.
+    """
+    entries = []
+    with os.scandir(path) as it:
+        for entry in it:
+            try:
+                is_dir = entry.is_dir(follow_symlinks=False)
+                is_file = not is_dir and entry.is_file(follow_symlinks=False)
+                size = entry.stat(follow_symlinks=False).st_size if is_file else 0
+            except OSError:
+                is_dir, is_file, size = False, False, 0
+            entries.append((entry.name, is_dir, is_file, size))
+    return entries
+
+
+def build_size_tree(path, name, gitignore=None):
+    """
+    Walk the whole subtree once, summing byte sizes and file counts into
+    each directory node. Depth limits only apply when rendering.
+    """
+    node = SizeNode(name, True)
+    try:
+        entries = scan_dir_sizes(path)
+    except PermissionError:
+        node.denied = True
+        return node
+
+    entries, gitignore = filter_entries(path, entries, gitignore)
+    entries.sort(key=lambda e: (e[2], e[0].lower()))
+
+    for child_name, is_dir, is_file, size in entries:
+        if is_dir:
+            child = build_size_tree(os.path.join(path, child_name), child_name, gitignore)
+        else:
+            child = SizeNode(child_name, False, size, 1 if is_file else 0)
+        node.children.append(child)
+        node.size += child.size
+        node.files += child.files
+
+    return node
 
 
-def generate_tree(path, max_level=None):
+def human_size(size):
+    for unit in ("B", "KB", "MB", "GB", "TB"):
+        if size < 1024 or unit == "TB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+def size_label(node, total, bar):
+    label = human_size(node.size)
+    if node.is_dir:
+        label += f", {node.files} files"
+    if bar:
+        share = node.size / total if total else 0.0
+        filled = round(share * BAR_WIDTH)
+        label += f"  [{'█' * filled}{' ' * (BAR_WIDTH - filled)}] {share * 100:5.1f}%"
+    return label
+
+
+def render_size_tree(node, total, prefix="", level=0, max_level=None, bar=False):
+    if max_level is not None and level >= max_level:
+        return
+
+    if node.denied:
+        yield f"{prefix}└── [Permission denied]"
+        return
+
+    for i, child in enumerate(node.children):
+        last = i == len(node.children) - 1
+        connector = "└── " if last else "├── "
+        name = f"{child.name}{'/' if child.is_dir else ''}"
+        yield f"{prefix}{connector}{name}  ({size_label(child, total, bar)})"
+
+        if child.is_dir:
+            extension = "    " if last else "│   "
+            yield from render_size_tree(child, total, prefix + extension, level + 1, max_level, bar)
+
+
+def largest(node, top, parent=""):
+    """The top largest subtrees and files below node, as (size, path) pairs"""
+    dirs = []
+    files = []
+    stack = [(node, parent)]
+    while stack:
+        current, rel = stack.pop()
+        for child in current.children:
+            child_rel = f"{rel}/{child.name}" if rel else child.name
+            if child.is_dir:
+                dirs.append((child.size, child_rel + "/"))
+                stack.append((child, child_rel))
+            else:
+                files.append((child.size, child_rel))
+    return heapq.nlargest(top, dirs), heapq.nlargest(top, files)
+
+
+def iter_size_tree(path, max_level=None, bar=False, top=0, gitignore=False):
+    """
+    Stream the annotated tree: recursive sizes and file counts per
+    directory, optional percentage bars and the largest subtrees/files.
+    Totals need the whole subtree, so the walk completes before printing.
+    """
     path = Path(path).resolve()
 
     if not path.exists():
-        return f"Error: {path} does not exist"
+        yield f"Error: {path} does not exist"
+        return
 
     if path.is_file():
-        return path.name
+        yield f"{path.name}  ({human_size(path.stat().st_size)})"
+        return
+
+    stack = GitignoreStack.for_root(str(path)) if gitignore else None
+    root = build_size_tree(str(path), path.name, stack)
+    yield f"{path.name}/  ({size_label(root, root.size, bar)})"
+    yield from render_size_tree(root, root.size, max_level=max_level, bar=bar)
 
-    lines = [f"{path.name}/"]
-    lines.extend(build_tree(path, max_level=max_level))
-    return "\n".join(lines)
+    if top:
+        dirs, files = largest(root, top)
+        yield ""
+        yield f"Largest {len(dirs)} directories:"
+        for size, rel in dirs:
+            yield f"  {human_size(size):>10}  {rel}"
+        yield ""
+        yield f"Largest {len(files)} files:"
+        for size, rel in files:
+            yield f"  {human_size(size):>10}  {rel}"
+
+
+# ------------------------
+# JSON / NDJSON export
+# ------------------------
+def scan_dir_stats(path):
+    """
+    Like scan_dir, plus each entry's lstat result (None if it vanished).
+    Symlinks are neither dirs nor files, so linked directories are not walked.
+    """
+    entries = []
+    with os.scandir(path) as it:
+        for entry in it:
+            try:
+                is_dir = entry.is_dir(follow_symlinks=False)
+                is_file = not is_dir and entry.is_file(follow_symlinks=False)
+                st = entry.stat(follow_symlinks=False)
+            except OSError:
+                is_dir, is_file, st = False, False, None
+            entries.append((entry.name, is_dir, is_file, st))
+    return entries
+
+
+def entry_kind(is_file, st):
+    if is_file:
+        return "file"
+    return "symlink" if st is not None and stat.S_ISLNK(st.st_mode) else "other"
+
+
+def make_record(rel, kind, st, depth):
+    return {
+        "path": rel,
+        "type": kind,
+        "size": st.st_size if st is not None else None,
+        "mtime": st.st_mtime if st is not None else None,
+        "depth": depth,
+    }
+
+
+def walk_entries(path, rel, st, depth=0, max_level=None, gitignore=None):
+    """
+    Yield one record per entry, depth-first in tree order, directory
+    before its contents. A directory that could not be listed carries an
+    "error" field.
+    """
+    entries = []
+    error = None
+    if max_level is None or depth < max_level:
+        try:
+            entries, gitignore = filter_entries(path, scan_dir_stats(path), gitignore)
+        except PermissionError:
+            error = "Permission denied"
+        entries.sort(key=lambda e: (e[2], e[0].lower()))
+
+    record = make_record(rel, "dir", st, depth)
+    if error:
+        record["error"] = error
+    yield record
+
+    for name, is_dir, is_file, child_st in entries:
+        child_rel = name if rel == "." else f"{rel}/{name}"
+        if is_dir:
+            yield from walk_entries(os.path.join(path, name), child_rel, child_st, depth + 1, max_level, gitignore)
+        else:
+            yield make_record(child_rel, entry_kind(is_file, child_st), child_st, depth + 1)
+
+
+def iter_records(path, max_level=None, gitignore=False):
+    """
+    Entry records for path as a lazy iterator; paths are relative to it,
+    root is ".". A missing path raises right away, before any output.
+    """
+    path = Path(path).resolve()
+
+    if not path.exists():
+        raise Exception(f"{path} does not exist")
+
+    st = path.stat()
+    if path.is_file():
+        return iter([make_record(path.name, "file", st, 0)])
+
+    stack = GitignoreStack.for_root(str(path)) if gitignore else None
+    return walk_entries(str(path), ".", st, max_level=max_level, gitignore=stack)
+
+
+def iter_json_lines(records, fmt):
+    """
+    Render records as NDJSON (one object per line) or as one JSON array,
+    either way line by line, so output starts before the walk ends.
+    """
+    if fmt == "ndjson":
+        for record in records:
+            yield json.dumps(record, separators=(",", ":"), ensure_ascii=False)
+        return
+
+    yield "["
+    previous = None
+    for record in records:
+        if previous is not None:
+            yield f"  {previous},"
+        previous = json.dumps(record, ensure_ascii=False)
+    if previous is not None:
+        yield f"  {previous}"
+    yield "]"
 
 
 # ------------------------
@@ -108,6 +561,21 @@ def main():
     parser.add_argument("-l", "--level", type=int, help="Max depth")
     parser.add_argument("-c", "--clipboard", action="store_true")
     parser.add_argument("-s", "--show-ignore", action="store_true")
+    parser.add_argument("--cache", action="store_true",
+                        help=f"Reuse unchanged directory listings from {CACHE_DIR} (for slow NFS/SMB mounts). "
+                             "Holds a record per directory in memory, where the default is bounded by depth")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="List sibling directories concurrently with N threads (for NFS/SMB)")
+    parser.add_argument("-g", "--gitignore", action="store_true",
+                        help="Honour .gitignore files at every level")
+    parser.add_argument("-f", "--format", choices=["text", "json", "ndjson"], default="text",
+                        help="Output format; json/ndjson emit path, type (dir, file, symlink, other), "
+                             "size, mtime and depth per entry")
+    parser.add_argument("--sizes", action="store_true",
+                        help="Annotate entries with recursive sizes and file counts")
+    parser.add_argument("--bar", action="store_true", help="With --sizes, add a percentage-of-total bar")
+    parser.add_argument("--top", type=int, default=0, metavar="N",
+                        help="With --sizes, list the N largest directories and files")
 
     args = parser.parse_args()
 
@@ -115,13 +583,29 @@ def main():
         print(json.dumps(config, indent=2))
         return
 
-    output = generate_tree(args.path, args.level)
+    if args.format != "text":
+        try:
+            lines = iter_json_lines(iter_records(args.path, args.level, args.gitignore), args.format)
+        except Exception as e:
+            print(f"Error: {e}")
+            return
+    elif args.sizes or args.bar or args.top:
+        lines = iter_size_tree(args.path, args.level, bar=args.bar, top=args.top, gitignore=args.gitignore)
+    else:
+        lines = iter_tree(args.path, args.level, use_cache=args.cache, jobs=args.jobs,
+                          gitignore=args.gitignore)
 
     if args.clipboard:
-        copy_to_clipboard(output)
+        from .clipboard_utils import copy_to_clipboard
+        copy_to_clipboard("\n".join(lines))
         print("Copied to clipboard")
     else:
-        print(output)
+        try:
+            for line in lines:
+                print(line)
+        except BrokenPipeError:
+            # Reader (e.g. head) went away; stop walking quietly
+            sys.stdout = open(os.devnull, "w")
 
 
 if __name__ == "__main__":
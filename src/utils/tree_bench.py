@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+fstree benchmarks on a synthetic tree
+
+    python -m utils.tree_bench [--entries N]
+    python -m utils.tree_bench --latency MS [--entries N] [--jobs N]
+    python -m utils.tree_bench --gitignore [--entries N]
+
+--latency adds a fixed delay to every directory listing to mimic an
+NFS/SMB mount and compares serial and parallel (--jobs) listing.
+--gitignore adds .gitignore files to the tree and compares the compiled,
+pruning matcher with walking everything and checking each entry against
+every rule of every .gitignore above it.
+"""
+
+import argparse
+import os
+import re
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from . import gitignore, tree
+
+
+# ------------------------
+# Synthetic tree
+# ------------------------
+def make_tree(root, entries, files_per_dir=10, dirs_per_dir=4):
+    """Create an empty-file tree with roughly the given number of entries"""
+    created = 0
+    queue = [root]
+    root.mkdir(parents=True, exist_ok=True)
+
+    while queue and created < entries:
+        folder = queue.pop(0)
+        for i in range(files_per_dir):
+            if created >= entries:
+                break
+            (folder / f"file{i}.txt").touch()
+            created += 1
+        for i in range(dirs_per_dir):
+            if created >= entries:
+                break
+            sub = folder / f"dir{i}"
+            sub.mkdir()
+            queue.append(sub)
+            created += 1
+
+    return created
+
+
+# ------------------------
+# Pre-scandir implementation, for comparison
+# ------------------------
+def legacy_should_ignore(path):
+    name = path.name
+    if path.is_dir():
+        return name in tree.config["ignore"]["folders"]
+    return name in tree.config["ignore"]["files"]
+
+
+def legacy_build_tree(path, prefix="", level=0, max_level=None):
+    if max_level is not None and level >= max_level:
+        return []
+
+    try:
+        items = [p for p in path.iterdir() if not legacy_should_ignore(p)]
+    except PermissionError:
+        return [f"{prefix}└── [Permission denied]"]
+
+    items.sort(key=lambda p: (p.is_file(), p.name.lower()))
+    lines = []
+
+    for i, item in enumerate(items):
+        last = i == len(items) - 1
+        connector = "└── " if last else "├── "
+        lines.append(f"{prefix}{connector}{item.name}{'/' if item.is_dir() else ''}")
+        if item.is_dir():
+            extension = "    " if last else "│   "
+            lines.extend(legacy_build_tree(item, prefix + extension, level + 1, max_level))
+
+    return lines
+
+
+def legacy_generate_tree(path):
+    path = Path(path).resolve()
+    return "\n".join([f"{path.name}/"] + legacy_build_tree(path))
+
+
+# ------------------------
+# Per-entry .gitignore checks, for comparison
+# ------------------------
+ROOT_RULES = [
+    "*.log", "*.tmp", "*.bak", "*.swp", "*.pyc", "*.o", "*.class", "*~",
+    ".env", ".cache/", "coverage/", "tmp/", "/dist/", "/build/", "**/out/**",
+    "dir3/", "file7.txt", "!dir0/**/file7.txt", "docs/**/*.html", "[ab]*.txt",
+]
+NESTED_RULES = ["file9.txt", "/dir2/", "!file7.txt"]
+
+
+def add_gitignores(root):
+    """A root .gitignore plus one in every dir0, returns how many were written"""
+    (root / ".gitignore").write_text("\n".join(ROOT_RULES) + "\n")
+    written = 1
+    for dirpath, dirnames, _ in os.walk(root):
+        if os.path.basename(dirpath) == "dir0":
+            with open(os.path.join(dirpath, ".gitignore"), "w") as f:
+                f.write("\n".join(NESTED_RULES) + "\n")
+            written += 1
+    return written
+
+
+def legacy_gitignore_files(root):
+    """Walk everything, then test every entry and its ancestors rule by rule"""
+    rule_files = {}
+    for dirpath, _, filenames in os.walk(root):
+        if ".gitignore" in filenames:
+            with open(os.path.join(dirpath, ".gitignore")) as f:
+                rule_files[dirpath] = [r for r in map(gitignore.parse_line, f) if r is not None]
+
+    def decide(path, is_dir):
+        decision = False
+        base = os.path.dirname(path)
+        bases = []
+        while True:
+            bases.append(base)
+            if base == str(root):
+                break
+            base = os.path.dirname(base)
+        for base in reversed(bases):
+            rel = path[len(base) + 1:]
+            for regex, negated, dir_only in rule_files.get(base, ()):
+                if dir_only and not is_dir:
+                    continue
+                if re.fullmatch(regex, rel, re.DOTALL):
+                    decision = not negated
+        return decision
+
+    def excluded(path, is_dir):
+        parent = os.path.dirname(path)
+        while parent != str(root):
+            if decide(parent, True):
+                return True
+            parent = os.path.dirname(parent)
+        return decide(path, is_dir)
+
+    files = []
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            if not excluded(path, False):
+                files.append(path)
+    return sorted(files)
+
+
+def compiled_gitignore_files(root):
+    files = []
+    stack = [(str(root), gitignore.GitignoreStack())]
+    while stack:
+        path, ignore = stack.pop()
+        entries = tree.scan_dir(path)
+        ignore = ignore.enter(path, [name for name, _, _ in entries])
+        for name, is_dir, _ in entries:
+            child = os.path.join(path, name)
+            if ignore.ignored(child, is_dir):
+                continue
+            if is_dir:
+                stack.append((child, ignore))
+            else:
+                files.append(child)
+    return sorted(files)
+
+
+def bench_gitignore(root):
+    written = add_gitignores(root)
+    print(f"{written} .gitignore files, {len(ROOT_RULES)} root rules:")
+    reference = timed("walk all, per-entry rules", lambda: legacy_gitignore_files(root))
+    kept = timed("compiled, pruned", lambda: compiled_gitignore_files(root), reference)
+    print(f"  {len(kept)} files kept")
+    timed("fstree --gitignore", lambda: tree.generate_tree(root, gitignore=True))
+
+
+# ------------------------
+# Benchmark
+# ------------------------
+def timed(label, func, reference=None):
+    start = time.perf_counter()
+    output = func()
+    elapsed = time.perf_counter() - start
+    same = "" if reference is None else f"  same output: {output == reference}"
+    print(f"  {label:<28} {elapsed:>8.3f}s{same}")
+    return output
+
+
+def bench_latency(root, latency_ms, jobs):
+    """Serial vs threaded listing when every listing costs latency_ms"""
+    scan_dir = tree.scan_dir
+
+    def slow_scan_dir(path):
+        time.sleep(latency_ms / 1000)
+        return scan_dir(path)
+
+    tree.scan_dir = slow_scan_dir
+    try:
+        print(f"Listing latency {latency_ms} ms:")
+        reference = timed("serial", lambda: tree.generate_tree(root))
+        timed(f"{jobs} threads", lambda: tree.generate_tree(root, jobs=jobs), reference)
+    finally:
+        tree.scan_dir = scan_dir
+
+
+def main():
+    parser = argparse.ArgumentParser(description="fstree benchmarks")
+    parser.add_argument("--entries", type=int, default=200_000)
+    parser.add_argument("--latency", type=float, help="Simulated per-listing latency in ms")
+    parser.add_argument("--jobs", type=int, default=16)
+    parser.add_argument("--gitignore", action="store_true", help="Benchmark .gitignore filtering")
+    args = parser.parse_args()
+
+    tmp = Path(tempfile.mkdtemp(prefix="fstree_bench_"))
+    tree.CACHE_DIR = tmp / "cache"
+    try:
+        root = tmp / "tree"
+        start = time.perf_counter()
+        created = make_tree(root, args.entries)
+        print(f"Created {created} entries in {time.perf_counter() - start:.1f}s\n")
+
+        if args.latency is not None:
+            bench_latency(root, args.latency, args.jobs)
+            return
+
+        if args.gitignore:
+            bench_gitignore(root)
+            return
+
+        reference = timed("legacy iterdir/is_dir", lambda: legacy_generate_tree(root))
+        timed("scandir, no cache", lambda: tree.generate_tree(root), reference)
+        timed("scandir, cold cache", lambda: tree.generate_tree(root, use_cache=True), reference)
+        timed("scandir, warm cache", lambda: tree.generate_tree(root, use_cache=True), reference)
+
+        (root / "dir0" / "dir1" / "new_file.txt").touch()
+        reference = legacy_generate_tree(root)
+        timed("warm cache, one dir changed", lambda: tree.generate_tree(root, use_cache=True), reference)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
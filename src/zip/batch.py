@@ -0,0 +1,58 @@
+"""
+Batch zipping helpers
+
+Projects built concurrently would interleave their progress output, so
+while a batch runs stdout is swapped for a proxy that buffers each worker
+thread's output; the batch prints every project's log as one block.
+"""
+
+import io
+import sys
+import threading
+from contextlib import contextmanager
+from typing import Iterator, Optional, TextIO
+
+
+class ThreadBufferedStdout(io.TextIOBase):
+    """stdout proxy: threads that called capture() write to their own buffer"""
+
+    def __init__(self, target: TextIO) -> None:
+        self.target: TextIO = target
+        self._local = threading.local()
+
+    def _buffer(self) -> Optional[io.StringIO]:
+        return getattr(self._local, 'buffer', None)
+
+    def write(self, text: str) -> int:
+        buffer: Optional[io.StringIO] = self._buffer()
+        if buffer is None:
+            return self.target.write(text)
+        return buffer.write(text)
+
+    def flush(self) -> None:
+        if self._buffer() is None:
+            self.target.flush()
+
+    def isatty(self) -> bool:
+        return self.target.isatty()
+
+    @contextmanager
+    def capture(self) -> Iterator[io.StringIO]:
+        """Buffer this thread's output for the duration of the block"""
+        self._local.buffer = io.StringIO()
+        try:
+            yield self._local.buffer
+        finally:
+            self._local.buffer = None
+
+
+@contextmanager
+def buffered_stdout() -> Iterator[ThreadBufferedStdout]:
+    """Install a ThreadBufferedStdout as sys.stdout for the duration of the block"""
+    original: TextIO = sys.stdout
+    proxy: ThreadBufferedStdout = ThreadBufferedStdout(original)
+    sys.stdout = proxy
+    try:
+        yield proxy
+    finally:
+        sys.stdout = original
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+zip_tool benchmarks on synthetic trees
+
+    python -m zip.bench jobs [--files N] [--size KB]
+    python -m zip.bench scan [--files N]
+"""
+
+import argparse
+import hashlib
+import os
+import random
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from .main import format_bytes, write_project_zip
+from .scan import ExclusionMatcher, scan_files
+
+WORDS: List[str] = ("def class return import self value data path file config "
+                    "node index render state props async await for while").split()
+
+
+def make_synthetic_tree(root: Path, files: int, size_kb: int, seed: int = 1) -> List[Path]:
+    """Create a tree of compressible, source-like text files"""
+    rng = random.Random(seed)
+    paths: List[Path] = []
+    for i in range(files):
+        folder: Path = root / f"pkg{i % 20}" / f"mod{i % 7}"
+        folder.mkdir(parents=True, exist_ok=True)
+        path: Path = folder / f"file{i}.py"
+        target: int = size_kb * 1024
+        lines: List[str] = []
+        length: int = 0
+        while length < target:
+            line: str = " ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 12))) + "\n"
+            lines.append(line)
+            length += len(line)
+        path.write_text("".join(lines))
+        paths.append(path)
+    return sorted(paths)
+
+
+def sha256_of(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def bench_jobs(files: int, size_kb: int) -> None:
+    """Compression throughput at 1, 2, 4 and all-core workers"""
+    cores: int = os.cpu_count() or 1
+    worker_counts: List[int] = sorted({1, 2, 4, cores})
+
+    tmp: Path = Path(tempfile.mkdtemp(prefix="zip_bench_"))
+    try:
+        root: Path = tmp / "tree"
+        paths: List[Path] = make_synthetic_tree(root, files, size_kb)
+        total: int = sum(p.stat().st_size for p in paths)
+        print(f"Synthetic tree: {len(paths)} files, {format_bytes(total)}, {cores} cores\n")
+        print(f"{'jobs':>5} {'seconds':>9} {'MB/s':>9} {'speedup':>8}  sha256")
+
+        digests: Dict[int, str] = {}
+        baseline: float = 0.0
+        for jobs in worker_counts:
+            output: Path = tmp / f"out_{jobs}.zip"
+            start: float = time.perf_counter()
+            write_project_zip(paths, root, output, jobs=jobs)
+            elapsed: float = time.perf_counter() - start
+            baseline = baseline or elapsed
+            digests[jobs] = sha256_of(output)
+            print(f"{jobs:>5} {elapsed:>9.3f} {total / elapsed / 1e6:>9.1f} "
+                  f"{baseline / elapsed:>7.2f}x  {digests[jobs][:16]}")
+
+        identical: bool = len(set(digests.values())) == 1
+        print(f"\nArchives identical across job counts: {identical}")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+EXCLUDE_FOLDERS: List[str] = [".git", "node_modules", "__pycache__", ".vscode", "dist"]
+EXCLUDE_FILES: List[str] = ["server.py", "*.log", "*.tmp", "cache*", "*secret*"]
+
+
+def make_scan_tree(root: Path, files: int) -> None:
+    """
+    Create an empty-file tree shaped like a JS/Python monorepo: roughly
+    40% of the files sit under node_modules and .git
+    """
+    per_dir: int = 100
+    for i in range(0, files, per_dir):
+        bucket: int = (i // per_dir) % 10
+        if bucket < 3:
+            folder: Path = root / "node_modules" / f"dep{i // 1000}" / f"lib{i // per_dir}"
+        elif bucket == 3:
+            folder = root / ".git" / "objects" / f"{i // per_dir:04x}"
+        else:
+            folder = root / "src" / f"pkg{i // 5000}" / f"mod{i // per_dir}"
+        folder.mkdir(parents=True, exist_ok=True)
+        for j in range(min(per_dir, files - i)):
+            suffix: str = (".py", ".js", ".log", ".json", ".tmp")[j % 5]
+            (folder / f"f{j}{suffix}").touch()
+
+
+def legacy_should_include_file(file_path: Path, exclude_folders: List[str], exclude_files: List[str]) -> bool:
+    """should_include_file as it was before the compiled matcher"""
+    file_path_str: str = str(file_path)
+    file_name: str = file_path.name
+    for folder in exclude_folders:
+        if folder in file_path_str:
+            return False
+    for pattern in exclude_files:
+        if pattern.startswith('*') and pattern.endswith('*'):
+            if pattern[1:-1] in file_name:
+                return False
+        elif pattern.startswith('*'):
+            if file_name.endswith(pattern[1:]):
+                return False
+        elif pattern.endswith('*'):
+            if file_name.startswith(pattern[:-1]):
+                return False
+        elif file_name == pattern:
+            return False
+    return True
+
+
+def legacy_scan(root: Path) -> List[Path]:
+    """rglob walk with per-path exclusion checks"""
+    return [p for p in root.rglob('*')
+            if p.is_file() and legacy_should_include_file(p, EXCLUDE_FOLDERS, EXCLUDE_FILES)]
+
+
+def bench_scan(files: int) -> None:
+    """Legacy rglob scan vs compiled matcher with directory pruning"""
+    tmp: Path = Path(tempfile.mkdtemp(prefix="zip_bench_"))
+    try:
+        root: Path = tmp / "tree"
+        start: float = time.perf_counter()
+        make_scan_tree(root, files)
+        print(f"Created {files} files in {time.perf_counter() - start:.1f}s\n")
+
+        start = time.perf_counter()
+        legacy: List[Path] = legacy_scan(root)
+        legacy_time: float = time.perf_counter() - start
+
+        start = time.perf_counter()
+        compiled: List[Path] = scan_files(root, ExclusionMatcher(EXCLUDE_FOLDERS, EXCLUDE_FILES))
+        compiled_time: float = time.perf_counter() - start
+
+        print(f"{'scanner':<10} {'seconds':>9} {'included':>9}")
+        print(f"{'legacy':<10} {legacy_time:>9.3f} {len(legacy):>9}")
+        print(f"{'compiled':<10} {compiled_time:>9.3f} {len(compiled):>9}")
+        print(f"\nSpeedup: {legacy_time / compiled_time:.1f}x, "
+              f"same files: {sorted(legacy) == sorted(compiled)}")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='zip_tool benchmarks')
+    sub = parser.add_subparsers(dest='bench', required=True)
+
+    jobs = sub.add_parser('jobs', help='Parallel compression throughput')
+    jobs.add_argument('--files', type=int, default=2000)
+    jobs.add_argument('--size', type=int, default=64, help='File size in KB')
+
+    scan = sub.add_parser('scan', help='Directory scan and exclusion matching')
+    scan.add_argument('--files', type=int, default=500_000)
+
+    args: argparse.Namespace = parser.parse_args()
+
+    if args.bench == 'jobs':
+        bench_jobs(args.files, args.size)
+    elif args.bench == 'scan':
+        bench_scan(args.files)
+
+
+if __name__ == "__main__":
+    main()
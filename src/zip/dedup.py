@@ -0,0 +1,77 @@
+"""
+Content-addressed deduplication
+
+Byte-identical files are stored once. The archive carries a restore
+manifest member mapping each left-out duplicate to the member holding its
+content; after extracting with any unzip tool, restore_duplicates copies
+the content back into place.
+"""
+
+import json
+import os
+import shutil
+from collections import defaultdict
+from pathlib import Path
+from typing import DefaultDict, Dict, List, Tuple
+
+from .manifest import Manifest, hash_file
+
+DEDUP_MANIFEST_NAME: str = ".zip_tool_dedup.json"
+
+
+def find_duplicates(files: List[Tuple[Path, str, os.stat_result]],
+                    known: Manifest) -> Dict[str, str]:
+    """
+    Map duplicate arcname -> canonical arcname (first in scan order).
+    Only files sharing a size with another file are hashed, and hashes of
+    files unchanged since the incremental manifest are taken from it.
+    """
+    by_size: DefaultDict[int, List[Tuple[Path, str, os.stat_result]]] = defaultdict(list)
+    for item in files:
+        if item[2].st_size > 0:
+            by_size[item[2].st_size].append(item)
+
+    duplicates: Dict[str, str] = {}
+    for group in by_size.values():
+        if len(group) < 2:
+            continue
+
+        canonical: Dict[str, str] = {}
+        for file_path, arcname, st in group:
+            entry = known.get(arcname)
+            if entry is not None and entry.get('size') == st.st_size and entry.get('mtime') == st.st_mtime_ns:
+                digest: str = entry['sha256']
+            else:
+                digest = hash_file(file_path)
+
+            if digest in canonical:
+                duplicates[arcname] = canonical[digest]
+            else:
+                canonical[digest] = arcname
+
+    return duplicates
+
+
+def dump_dedup_manifest(duplicates: Dict[str, str]) -> str:
+    return json.dumps({'duplicates': duplicates}, indent=1, sort_keys=True)
+
+
+def restore_duplicates(extract_dir: Path) -> int:
+    """Recreate deduplicated files in an extracted archive, returns the count restored"""
+    manifest_path: Path = extract_dir / DEDUP_MANIFEST_NAME
+    try:
+        with open(manifest_path, 'r') as f:
+            duplicates: Dict[str, str] = json.load(f)['duplicates']
+    except FileNotFoundError:
+        raise Exception(f"No dedup manifest found: {manifest_path}")
+
+    root: Path = extract_dir.resolve()
+    for duplicate, canonical in duplicates.items():
+        target: Path = (root / duplicate).resolve()
+        source: Path = (root / canonical).resolve()
+        if root not in target.parents or root not in source.parents:
+            raise Exception(f"Refusing to restore outside {root}: {duplicate}")
+        target.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copy2(source, target)
+
+    return len(duplicates)
@@ -0,0 +1,122 @@
+"""
+Parallel compression engine
+
+Members are compressed in a process pool and handed back in submission
+order, so the archive written from them is byte-identical whatever the
+number of workers.
+"""
+
+import hashlib
+import itertools
+import multiprocessing
+import time
+import zipfile
+import zlib
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import Deque, Iterator, List, NamedTuple, Optional, Tuple
+
+from .policy import AUTO_MAX_RATIO, DEFAULT_METHOD, Method, resolve_method
+from .rawzip import TimedReader, read_chunks
+
+# Files above this size are streamed by the writer instead of being
+# compressed in a worker and shipped back whole
+POOL_MAX_FILE_SIZE: int = 32 * 1024 * 1024
+
+# Tighter limit when streaming, so buffered compressed members stay small
+# and everything larger is chunk-streamed with data descriptors
+STREAM_POOL_MAX_FILE_SIZE: int = 1024 * 1024
+
+# Compressed members buffered ahead of the writer, per worker
+PREFETCH_PER_WORKER: int = 4
+
+# Input bytes submitted but not yet handed to the writer, whatever the
+# number of workers (a single larger member still goes through alone)
+PREFETCH_MAX_BYTES: int = 256 * 1024 * 1024
+
+# Workers start from a clean server process (or spawn on Windows), never a
+# fork of the caller: zip_projects builds from several threads, and forking
+# while another thread holds a lock (stdout proxy, imports, allocator) can
+# deadlock the child
+POOL_CONTEXT = multiprocessing.get_context(
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn")
+
+
+class CompressedMember(NamedTuple):
+    data: bytes
+    crc: int
+    file_size: int
+    sha256: str
+    method: Method
+    seconds: float
+    read_seconds: float
+
+
+def compress_member(file_path: Path, spec: str = DEFAULT_METHOD,
+                    max_ratio: float = AUTO_MAX_RATIO) -> CompressedMember:
+    """
+    Read and compress one file, the same way ZipFile.open(..., 'w') would.
+    'auto' specs are resolved against the first block read. seconds is
+    the whole member, read_seconds the part spent reading the file.
+    """
+    start: float = time.perf_counter()
+    hasher = hashlib.sha256()
+    crc: int = 0
+    file_size: int = 0
+    parts: List[bytes] = []
+
+    with open(file_path, 'rb') as f:
+        src: TimedReader = TimedReader(f)
+        chunks: Iterator[bytes] = read_chunks(src)
+        first: bytes = next(chunks, b'')
+        method: Method = resolve_method(spec, first, max_ratio)
+        compressor = zipfile._get_compressor(method.compress_type, method.level)
+
+        for chunk in itertools.chain([first], chunks):
+            crc = zlib.crc32(chunk, crc)
+            hasher.update(chunk)
+            file_size += len(chunk)
+            parts.append(compressor.compress(chunk) if compressor else chunk)
+
+    if compressor:
+        parts.append(compressor.flush())
+
+    return CompressedMember(b''.join(parts), crc, file_size, hasher.hexdigest(),
+                            method, time.perf_counter() - start, src.seconds)
+
+
+def iter_compressed(tasks: List[Tuple[Path, str, int]], jobs: int = 1,
+                    max_ratio: float = AUTO_MAX_RATIO) -> Iterator[CompressedMember]:
+    """
+    Compress (file, method spec, file size) tasks and yield the results in
+    input order. The size is the caller's stat, used for the byte window.
+    With jobs > 1 work runs in a process pool with a prefetch window bounded
+    by member count and by input bytes in flight, so memory held by
+    finished-but-unwritten members does not grow with jobs.
+    """
+    if jobs <= 1:
+        for file_path, spec, _ in tasks:
+            yield compress_member(file_path, spec, max_ratio)
+        return
+
+    with ProcessPoolExecutor(max_workers=jobs, mp_context=POOL_CONTEXT) as pool:
+        pending: Deque[Tuple[Future, int]] = deque()
+        in_flight: int = 0
+        max_pending: int = jobs * PREFETCH_PER_WORKER
+        remaining = iter(tasks)
+        task: Optional[Tuple[Path, str, int]] = next(remaining, None)
+
+        while task is not None or pending:
+            while task is not None and len(pending) < max_pending:
+                file_path, spec, size = task
+                if pending and in_flight + size > PREFETCH_MAX_BYTES:
+                    break
+                pending.append((pool.submit(compress_member, file_path, spec, max_ratio), size))
+                in_flight += size
+                task = next(remaining, None)
+
+            future, submitted = pending.popleft()
+            result: CompressedMember = future.result()
+            in_flight -= submitted
+            yield result
@@ -4,11 +4,26 @@ Simple Project Zipping Utility
 """
 
 import argparse
+import hashlib
 import json
+import os
 import zipfile
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import BinaryIO, Dict, Iterator, List, Any, Optional, TextIO, Tuple
+
+from utils.gitignore import GitignoreStack
+
+from .batch import buffered_stdout
+from .dedup import DEDUP_MANIFEST_NAME, dump_dedup_manifest, find_duplicates, restore_duplicates
+from .engine import POOL_MAX_FILE_SIZE, STREAM_POOL_MAX_FILE_SIZE, CompressedMember, iter_compressed
+from .manifest import Manifest, ManifestEntry, get_manifest_path, is_unchanged, load_manifest, make_entry, save_manifest
+from .policy import DEFAULT_METHOD, REUSED_METHOD, CompressionPolicy, Method, PolicyStats, resolve_method_for_file
+from .rawzip import CountingWriter, copy_raw_member, make_zipinfo, write_file_member, write_raw_member
+from .report import SAMPLE_FILES, TOP_FILES, ZipProfile
+from .scan import ExclusionMatcher, ScanCache, scan_files
 
 # Color codes for output
 COLORS: Dict[str, str] = {
@@ -19,6 +34,8 @@ COLORS: Dict[str, str] = {
     'RESET': '\033[0m'
 }
 
+STDOUT_OUTPUT: str = "-"
+
 def get_default_config_path() -> Path:
     """Get the default config path relative to the script location"""
     script_dir = Path(__file__).parent
@@ -69,110 +86,463 @@ def list_projects(config_path: Optional[str] = None) -> None:
     except FileNotFoundError:
         color_print(f"Config file not found: {config_file}", COLORS['RED'])
 
-def should_include_file(file_path: Path, exclude_folders: List[str], exclude_files: List[str]) -> bool:
-    """Check if file should be included (not excluded)"""
-    file_path_str: str = str(file_path)
-    file_name: str = file_path.name
-    
-    # Check folder exclusion
-    for folder in exclude_folders:
-        if folder in file_path_str:
-            return False
-    
-    # Check file exclusion
-    for pattern in exclude_files:
-        if pattern.startswith('*') and pattern.endswith('*'):
-            # *text* pattern
-            pattern_content: str = pattern[1:-1]
-            if pattern_content in file_name:
-                return False
-        elif pattern.startswith('*'):
-            # *.ext pattern  
-            if file_name.endswith(pattern[1:]):
-                return False
-        elif pattern.endswith('*'):
-            # prefix* pattern
-            if file_name.startswith(pattern[:-1]):
-                return False
-        else:
-            # exact match
-            if file_name == pattern:
-                return False
+def format_bytes(size: float) -> str:
+    """Human readable byte count"""
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if size < 1024 or unit == 'GB':
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+def write_project_zip(files_to_zip: List[Path], root_path: Path, output_zip: Path,
+                      incremental: bool = False, jobs: int = 1,
+                      stream: Optional[BinaryIO] = None,
+                      policy: Optional[CompressionPolicy] = None,
+                      dedup: bool = False,
+                      profile: Optional[ZipProfile] = None) -> PolicyStats:
+    """
+    Write the archive. Small files are compressed by the engine (in a
+    process pool when jobs > 1) and written in scan order, so the result
+    does not depend on jobs. In incremental mode the compressed bytes of
+    unchanged files are copied from the previous archive instead.
+    
+    With stream set the archive goes to that (possibly unseekable) stream
+    instead of output_zip: larger files are read in fixed-size chunks and
+    written with data descriptors, so memory stays flat.
+    
+    policy picks the compression method per file (deflate when unset).
+    With dedup, byte-identical files are stored once and the rest are
+    listed in a restore manifest member. Phase timings and per-file
+    compression times go to profile. Returns per-method totals.
+    """
+    if stream is not None and incremental:
+        raise Exception("Incremental mode needs a file output, not a stream")
+    
+    pool_max_file_size: int = STREAM_POOL_MAX_FILE_SIZE if stream is not None else POOL_MAX_FILE_SIZE
+    policy = policy or CompressionPolicy()
+    profile = profile or ZipProfile()
+    stats: PolicyStats = PolicyStats()
+    manifest_path: Path = get_manifest_path(output_zip)
+    previous: Manifest = {}
+    if incremental and output_zip.exists():
+        previous = load_manifest(manifest_path)
+    current: Manifest = {}
+    tmp_zip: Path = output_zip.with_name(output_zip.name + ".tmp")
+    
+    reused_files: int = 0
+    reused_bytes: int = 0
+    recompressed_files: int = 0
+    recompressed_bytes: int = 0
+    
+    old_zip: Optional[zipfile.ZipFile] = None
+    if previous:
+        try:
+            old_zip = zipfile.ZipFile(output_zip, 'r')
+        except zipfile.BadZipFile:
+            color_print("Previous archive is unreadable, recompressing everything", COLORS['YELLOW'])
+            previous = {}
+    
+    with profile.phase('stat'):
+        entries: List[Tuple[Path, str, os.stat_result]] = [
+            (file_path, file_path.relative_to(root_path).as_posix(), file_path.stat())
+            for file_path in files_to_zip
+        ]
+    profile.files = len(entries)
+    profile.sample = [(arcname, st.st_size) for _, arcname, st in entries[:SAMPLE_FILES]]
+    
+    duplicates: Dict[str, str] = {}
+    hash_seconds: float = 0.0
+    if dedup:
+        with profile.phase('dedup_hash'):
+            hash_start: float = time.perf_counter()
+            duplicates = find_duplicates(entries, previous)
+            hash_seconds = time.perf_counter() - hash_start
     
-    return True
+    # Decide per file: copy from the previous archive, compress in the
+    # engine, or stream (too large to hand back from a worker)
+    plan: List[Tuple[Path, str, os.stat_result, str, Optional[zipfile.ZipInfo]]] = []
+    to_compress: List[Tuple[Path, str, int]] = []
+    with profile.phase('plan'):
+        for file_path, arcname, st in entries:
+            if arcname in duplicates:
+                continue
+            spec: str = policy.spec_for(file_path.name)
+            entry: Optional[ManifestEntry] = previous.get(arcname)
+            old_info: Optional[zipfile.ZipInfo] = None
+            if old_zip is not None and entry is not None and entry.get('method', DEFAULT_METHOD) == spec:
+                old_info = old_zip.NameToInfo.get(arcname)
+                if old_info is None or old_info.CRC != entry['crc'] or not is_unchanged(file_path, st, entry):
+                    old_info = None
+            if old_info is None and st.st_size <= pool_max_file_size:
+                to_compress.append((file_path, spec, st.st_size))
+            plan.append((file_path, arcname, st, spec, old_info))
+    
+    counter: Optional[CountingWriter] = CountingWriter(stream) if stream is not None else None
+    try:
+        compressed: Iterator[CompressedMember] = iter_compressed(to_compress, jobs, policy.max_ratio)
+        with profile.phase('compress_write'), \
+                zipfile.ZipFile(counter or tmp_zip, 'w', zipfile.ZIP_DEFLATED) as zipf:
+            for file_path, arcname, st, spec, old_info in plan:
+                zinfo: zipfile.ZipInfo = make_zipinfo(file_path, arcname, st)
+                
+                if old_info is not None:
+                    copied: int = copy_raw_member(old_zip, old_info, zipf, zinfo)
+                    reused_bytes += copied
+                    reused_files += 1
+                    stats.add(REUSED_METHOD, old_info.file_size, copied, 0.0)
+                    current[arcname] = make_entry(st, previous[arcname]['sha256'], old_info.CRC, spec)
+                    continue
+                
+                if st.st_size <= pool_max_file_size:
+                    member: CompressedMember = next(compressed)
+                    zinfo.compress_type = member.method.compress_type
+                    zinfo.CRC = member.crc
+                    zinfo.file_size = member.file_size
+                    zinfo.compress_size = len(member.data)
+                    write_raw_member(zipf, zinfo, [member.data])
+                    recompressed_bytes += member.file_size
+                    stats.add(member.method, member.file_size, zinfo.compress_size, member.seconds)
+                    profile.add_file(arcname, member.file_size, zinfo.compress_size,
+                                     member.seconds, member.method.label, member.read_seconds)
+                    digest: str = member.sha256
+                else:
+                    start: float = time.perf_counter()
+                    method: Method = resolve_method_for_file(file_path, spec, policy.max_ratio)
+                    zinfo.compress_type = method.compress_type
+                    zinfo._compresslevel = method.level
+                    hasher = hashlib.sha256()
+                    read_bytes, read_seconds = write_file_member(zipf, file_path, zinfo, hasher)
+                    recompressed_bytes += read_bytes
+                    seconds: float = time.perf_counter() - start
+                    stats.add(method, zinfo.file_size, zinfo.compress_size, seconds)
+                    profile.add_file(arcname, zinfo.file_size, zinfo.compress_size, seconds, method.label,
+                                     read_seconds)
+                    digest = hasher.hexdigest()
+                
+                recompressed_files += 1
+                current[arcname] = make_entry(st, digest, zinfo.CRC, spec)
+            
+            if duplicates:
+                zipf.writestr(DEDUP_MANIFEST_NAME, dump_dedup_manifest(duplicates))
+    except BaseException:
+        if stream is None:
+            tmp_zip.unlink(missing_ok=True)
+        raise
+    finally:
+        if old_zip is not None:
+            old_zip.close()
+    
+    if duplicates:
+        print_dedup_summary(duplicates, entries, stats, zipf, hash_seconds)
+    
+    if counter is not None:
+        counter.flush()
+        profile.bytes_written = counter.written
+        return stats
+    
+    with profile.phase('finalize'):
+        profile.bytes_written = tmp_zip.stat().st_size
+        os.replace(tmp_zip, output_zip)
+        if incremental:
+            save_manifest(manifest_path, current)
+    
+    if incremental:
+        color_print(f"Reused {reused_files} unchanged files ({format_bytes(reused_bytes)} compressed bytes copied)", COLORS['CYAN'])
+        color_print(f"Recompressed {recompressed_files} new or changed files ({format_bytes(recompressed_bytes)} read)", COLORS['CYAN'])
+    
+    return stats
+
+def print_dedup_summary(duplicates: Dict[str, str], entries: List[Tuple[Path, str, os.stat_result]],
+                        stats: PolicyStats, zipf: zipfile.ZipFile, hash_seconds: float) -> None:
+    """Space saved by deduplication, and compression time saved net of hashing"""
+    sizes: Dict[str, int] = {arcname: st.st_size for _, arcname, st in entries}
+    compressed: Dict[str, int] = {info.filename: info.compress_size for info in zipf.filelist}
+    skipped_bytes: int = sum(sizes[dup] for dup in duplicates)
+    saved_bytes: int = sum(compressed.get(canonical, 0) for canonical in duplicates.values())
+    
+    seconds: float = sum(row['seconds'] for label, row in stats.rows.items() if label != REUSED_METHOD.label)
+    size: int = sum(row['bytes_in'] for label, row in stats.rows.items() if label != REUSED_METHOD.label)
+    saved_time: str = f"{skipped_bytes * seconds / size - hash_seconds:+.2f}s" if size else "n/a"
+    
+    color_print(f"Deduplicated {len(duplicates)} files: {format_bytes(skipped_bytes)} not compressed, "
+                f"{format_bytes(saved_bytes)} archive space saved, {saved_time} time "
+                f"(after {hash_seconds:.2f}s hashing)", COLORS['CYAN'])
+
+def print_policy_summary(stats: PolicyStats) -> None:
+    """Per compression method: files, bytes in/out/saved, time and time saved vs deflate"""
+    baseline: Optional[float] = stats.deflate_seconds_per_byte()
+    color_print("Compression summary:", COLORS['CYAN'])
+    print(f"  {'method':<16} {'files':>7} {'input':>10} {'output':>10} {'saved':>10} {'time':>8} {'vs deflate':>10}")
+    for label, row in sorted(stats.rows.items()):
+        time_saved: str = "n/a"
+        if baseline is not None:
+            time_saved = f"{baseline * row['bytes_in'] - row['seconds']:+.2f}s"
+        print(f"  {label:<16} {row['files']:>7} {format_bytes(row['bytes_in']):>10} "
+              f"{format_bytes(row['bytes_out']):>10} {format_bytes(row['bytes_in'] - row['bytes_out']):>10} "
+              f"{row['seconds']:>7.2f}s {time_saved:>10}")
 
-def create_project_zip(project_name: str, config_path: Optional[str] = None) -> None:
-    """Main function to create zip for a project"""
+def create_project_zip(project_name: str, config_path: Optional[str] = None,
+                       incremental: bool = False, jobs: int = 1,
+                       output: Optional[str] = None, stream: Optional[BinaryIO] = None,
+                       cache: Optional[ScanCache] = None, dedup: bool = False,
+                       profile: Optional[ZipProfile] = None, gitignore: bool = False) -> Dict[str, Any]:
+    """
+    Main function to create zip for a project, returns file counts and
+    phase timings. Pass a ZipProfile to collect the detailed timings.
+    .gitignore files are honoured with gitignore or the project's
+    useGitignore setting.
+    """
+    profile = profile or ZipProfile()
+    result: Dict[str, Any] = {'files': 0, 'bytes_in': 0, 'bytes_out': 0,
+                              'scan_seconds': 0.0, 'write_seconds': 0.0, 'profile': profile}
     color_print(f"Loading configuration for: {project_name}", COLORS['YELLOW'])
     
     # Load config
-    config: Dict[str, Any] = load_config(project_name, config_path)
+    with profile.phase('config'):
+        config: Dict[str, Any] = load_config(project_name, config_path)
     
-    root_path: Path = Path(config['rootPath'])
-    output_zip: Path = Path(config['outputZip'])
+    root_path: Path = Path(os.path.abspath(config['rootPath']))
+    output_zip: Path = Path(output or config['outputZip'])
     exclude_folders: List[str] = config.get('excludeFolders', [])
     exclude_files: List[str] = config.get('excludeFiles', [])
+    use_gitignore: bool = gitignore or config.get('useGitignore', False)
     
     color_print(f"Root path: {root_path}", COLORS['CYAN'])
-    color_print(f"Output zip: {output_zip}", COLORS['CYAN'])
+    color_print(f"Output zip: {'<stream>' if stream is not None else output_zip}", COLORS['CYAN'])
     
     if not root_path.exists():
         raise Exception(f"Root path does not exist: {root_path}")
     
     # Find all files to include
     color_print("Scanning files...", COLORS['YELLOW'])
-    files_to_zip: List[Path] = []
+    start: float = time.perf_counter()
+    matcher: ExclusionMatcher = ExclusionMatcher(exclude_folders, exclude_files)
+    ignore: Optional[GitignoreStack] = GitignoreStack.for_root(str(root_path)) if use_gitignore else None
     
-    for file_path in root_path.rglob('*'):
-        if file_path.is_file():
-            if should_include_file(file_path, exclude_folders, exclude_files):
-                files_to_zip.append(file_path)
+    # Never pack the archive or its manifest into itself
+    own_files = {output_zip.resolve(), get_manifest_path(output_zip).resolve()}
+    with profile.phase('scan'):
+        files_to_zip: List[Path] = scan_files(root_path, matcher, skip=own_files, cache=cache,
+                                                gitignore=ignore)
+    result['scan_seconds'] = time.perf_counter() - start
+    result['files'] = len(files_to_zip)
     
     if not files_to_zip:
         color_print("No files found to include!", COLORS['RED'])
-        return
+        return result
     
     color_print(f"Found {len(files_to_zip)} files to include", COLORS['GREEN'])
     
     # Create zip
     color_print("Creating zip file...", COLORS['YELLOW'])
-    output_zip.parent.mkdir(parents=True, exist_ok=True)
+    if stream is None:
+        output_zip.parent.mkdir(parents=True, exist_ok=True)
+    
+    policy: Optional[CompressionPolicy] = None
+    if 'compression' in config:
+        policy = CompressionPolicy(config['compression'])
+    
+    start = time.perf_counter()
+    stats: PolicyStats = write_project_zip(files_to_zip, root_path, output_zip, incremental, jobs,
+                                           stream, policy, dedup, profile)
+    result['write_seconds'] = time.perf_counter() - start
+    result['bytes_in'] = sum(row['bytes_in'] for row in stats.rows.values())
+    result['bytes_out'] = sum(row['bytes_out'] for row in stats.rows.values())
     
-    with zipfile.ZipFile(output_zip, 'w', zipfile.ZIP_DEFLATED) as zipf:
-        for file_path in files_to_zip:
-            arcname: Path = file_path.relative_to(root_path)
-            zipf.write(file_path, arcname)
+    if stream is not None:
+        color_print("Zip streamed successfully", COLORS['GREEN'])
+    else:
+        color_print(f"Zip created successfully: {output_zip}", COLORS['GREEN'])
     
-    color_print(f"Zip created successfully: {output_zip}", COLORS['GREEN'])
+    if policy is not None:
+        print_policy_summary(stats)
     
-    # Show sample files
+    # Show sample files (sizes come from the scan, no second stat)
     color_print("Sample of included files:", COLORS['CYAN'])
-    for file_path in files_to_zip[:10]:
-        size_kb: float = file_path.stat().st_size / 1024
-        rel_path: Path = file_path.relative_to(root_path)
-        print(f"  {rel_path} - {size_kb:.1f} KB")
+    for rel_path, size in profile.sample:
+        print(f"  {rel_path} - {size / 1024:.1f} KB")
+    
+    if len(files_to_zip) > SAMPLE_FILES:
+        print(f"  ... and {len(files_to_zip) - SAMPLE_FILES} more files")
+    
+    result['profile'] = profile
+    return result
+
+def load_project_names(config_path: Optional[str] = None) -> List[str]:
+    """All project names in the config, in file order"""
+    if config_path is None:
+        config_path = str(get_default_config_path())
     
-    if len(files_to_zip) > 10:
-        print(f"  ... and {len(files_to_zip) - 10} more files")
+    try:
+        with open(config_path, 'r') as f:
+            return list(json.load(f).keys())
+    except FileNotFoundError:
+        raise Exception(f"Config file not found: {config_path}")
+    except json.JSONDecodeError:
+        raise Exception(f"Invalid JSON in config file: {config_path}")
+
+def zip_projects(project_names: List[str], config_path: Optional[str] = None,
+                 incremental: bool = False, jobs: int = 1, concurrency: int = 2,
+                 dedup: bool = False, gitignore: bool = False,
+                 top_n: int = TOP_FILES) -> Dict[str, Dict[str, Any]]:
+    """
+    Build several archives in one invocation. Up to concurrency projects
+    build at once (each with its own jobs workers), directory listings are
+    shared so overlapping roots are walked once, and each project's log is
+    printed as a block when it finishes. Returns each project's result,
+    profiled with its top_n slowest files.
+    """
+    cache: ScanCache = ScanCache()
+    results: Dict[str, Dict[str, Any]] = {}
+    
+    def build(project_name: str) -> Tuple[str, Dict[str, Any], str]:
+        start: float = time.perf_counter()
+        with proxy.capture() as log:
+            try:
+                result: Dict[str, Any] = create_project_zip(project_name, config_path, incremental, jobs,
+                                                            cache=cache, dedup=dedup, profile=ZipProfile(top_n),
+                                                            gitignore=gitignore)
+                result['status'] = 'ok'
+            except Exception as e:
+                color_print(f"Error: {e}", COLORS['RED'])
+                result = {'status': 'failed'}
+        result['total_seconds'] = time.perf_counter() - start
+        return project_name, result, log.getvalue()
+    
+    batch_start: float = time.perf_counter()
+    with buffered_stdout() as proxy:
+        with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+            for project_name, result, log in pool.map(build, project_names):
+                color_print(f"=== {project_name} ===", COLORS['CYAN'])
+                print(log, end='')
+                print()
+                results[project_name] = result
+    batch_seconds: float = time.perf_counter() - batch_start
+    
+    color_print("Batch summary:", COLORS['CYAN'])
+    print(f"  {'project':<20} {'status':<7} {'files':>7} {'output':>10} {'scan':>8} {'write':>8} {'total':>8}")
+    for project_name in project_names:
+        result = results[project_name]
+        print(f"  {project_name:<20} {result['status']:<7} {result.get('files', 0):>7} "
+              f"{format_bytes(result.get('bytes_out', 0)):>10} {result.get('scan_seconds', 0.0):>7.2f}s "
+              f"{result.get('write_seconds', 0.0):>7.2f}s {result['total_seconds']:>7.2f}s")
+    print(f"  {len(project_names)} projects in {batch_seconds:.2f}s, "
+          f"{cache.misses} directories listed, {cache.hits} listings shared")
+    
+    return results
+
+def project_report(project_name: str, result: Dict[str, Any]) -> Dict[str, Any]:
+    """JSON-ready report for one project's result"""
+    report: Dict[str, Any] = {'project': project_name}
+    for key, value in result.items():
+        if isinstance(value, ZipProfile):
+            report[key] = value.to_dict()
+        elif isinstance(value, float):
+            report[key] = round(value, 6)
+        else:
+            report[key] = value
+    return report
+
+def print_profile(project_name: str, result: Dict[str, Any]) -> None:
+    """Text profile for one project's result"""
+    profile: Optional[ZipProfile] = result.get('profile')
+    if profile is None:
+        return
+    color_print(f"Profile for {project_name}:", COLORS['CYAN'])
+    for line in profile.text_lines():
+        print(line)
 
 def main() -> None:
     parser = argparse.ArgumentParser(description='Create zip archives for projects')
-    parser.add_argument('project', nargs='?', help='Project name to zip')
+    parser.add_argument('project', nargs='*', help='Project name(s) to zip')
     parser.add_argument('--config', '-c', help='Config file path (default: auto-detect)')
     parser.add_argument('--list', '-l', action='store_true', help='List available projects')
+    parser.add_argument('--all', '-a', action='store_true', help='Zip every project in the config')
+    parser.add_argument('--concurrency', type=int, default=2, metavar='N',
+                        help='Projects built at once when zipping several (default: 2)')
+    parser.add_argument('--incremental', '-i', action='store_true',
+                        help='Reuse compressed data of unchanged files from the previous archive')
+    parser.add_argument('--jobs', '-j', type=int, default=1, metavar='N',
+                        help='Compress with N worker processes (0 = all cores)')
+    parser.add_argument('--output', '-o', metavar='PATH',
+                        help="Write the archive to PATH instead of outputZip ('-' = stdout)")
+    parser.add_argument('--stdout', action='store_true', help="Stream the archive to stdout (same as --output -)")
+    parser.add_argument('--gitignore', '-g', action='store_true',
+                        help="Honour .gitignore files at every level (or set useGitignore in the project)")
+    parser.add_argument('--dedup', action='store_true',
+                        help='Store byte-identical files once, with a restore manifest for the copies')
+    parser.add_argument('--restore-duplicates', metavar='DIR',
+                        help='Recreate deduplicated files in an extracted archive')
+    parser.add_argument('--profile', action='store_true',
+                        help='Print phase timings, throughput and the slowest files (same as --report text)')
+    parser.add_argument('--report', choices=['text', 'json'],
+                        help='Timing report format; json prints one report object on stdout')
+    parser.add_argument('--top', type=int, default=TOP_FILES, metavar='N',
+                        help=f'Slowest files listed in the timing report (default: {TOP_FILES})')
     
     args: argparse.Namespace = parser.parse_args()
+    output: Optional[str] = STDOUT_OUTPUT if args.stdout else args.output
+    report_format: Optional[str] = 'text' if args.profile and not args.report else args.report
+    stream: Optional[BinaryIO] = None
+    report_out: TextIO = sys.stdout
+    
+    if output == STDOUT_OUTPUT:
+        # The archive owns stdout; all status output moves to stderr
+        stream = sys.stdout.buffer
+        report_out = sys.stderr
+        sys.stdout = sys.stderr
+        output = None
+    elif report_format == 'json':
+        # Keep stdout for the JSON report alone
+        sys.stdout = sys.stderr
     
     try:
+        jobs: int = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+        projects: List[str] = load_project_names(args.config) if args.all else args.project
+        
         if args.list:
             list_projects(args.config)
-        elif args.project:
-            create_project_zip(args.project, args.config)
+        elif args.restore_duplicates:
+            restored: int = restore_duplicates(Path(args.restore_duplicates))
+            color_print(f"Restored {restored} duplicate files", COLORS['GREEN'])
+        elif len(projects) > 1:
+            if output is not None or stream is not None:
+                raise Exception("--output/--stdout work with a single project only")
+            results: Dict[str, Dict[str, Any]] = zip_projects(projects, args.config, args.incremental, jobs,
+                                                              args.concurrency, args.dedup, args.gitignore,
+                                                              args.top)
+            if report_format == 'text':
+                for project_name, result in results.items():
+                    print_profile(project_name, result)
+            elif report_format == 'json':
+                reports = [project_report(name, result) for name, result in results.items()]
+                print(json.dumps({'projects': reports}, indent=2), file=report_out)
+            if not all(result['status'] == 'ok' for result in results.values()):
+                sys.exit(1)
+        elif projects:
+            result = create_project_zip(projects[0], args.config, args.incremental, jobs, output, stream,
+                                        dedup=args.dedup, profile=ZipProfile(args.top),
+                                        gitignore=args.gitignore)
+            if report_format == 'text':
+                print_profile(projects[0], result)
+            elif report_format == 'json':
+                print(json.dumps(project_report(projects[0], result), indent=2), file=report_out)
         else:
             parser.print_help()
             print("\nExamples:")
             print("  zip cv")
             print("  zip cv --config /path/to/config.json") 
+            print("  zip cv --incremental")
+            print("  zip cv --jobs 8")
+            print("  zip cv --stdout | upload-tool")
+            print("  zip cv blog docs --concurrency 3")
+            print("  zip --all")
+            print("  zip cv --gitignore")
+            print("  zip cv --dedup")
+            print("  zip --restore-duplicates extracted/cv")
+            print("  zip cv --profile")
+            print("  zip cv --report json > report.json")
+            print("  zip cv --profile --top 25")
             print("  zip --list")
             
     except Exception as e:
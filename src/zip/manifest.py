@@ -0,0 +1,79 @@
+"""
+Incremental zip manifest
+
+The manifest lives next to outputZip and records, per archive member,
+the source size, mtime and content hash used to decide whether the
+compressed bytes from the previous archive can be reused.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from .rawzip import read_chunks
+
+MANIFEST_VERSION: int = 1
+
+ManifestEntry = Dict[str, Any]
+Manifest = Dict[str, ManifestEntry]
+
+
+def get_manifest_path(output_zip: Path) -> Path:
+    """Manifest path for an archive, e.g. cv.zip -> cv.zip.manifest.json"""
+    return output_zip.with_name(output_zip.name + ".manifest.json")
+
+
+def hash_file(file_path: Path) -> str:
+    """SHA-256 of a file's content, read in chunks"""
+    hasher = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in read_chunks(f):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def load_manifest(manifest_path: Path) -> Manifest:
+    """Load a manifest, returning an empty one if missing or unreadable"""
+    try:
+        with open(manifest_path, 'r') as f:
+            data: Dict[str, Any] = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+    if data.get('version') != MANIFEST_VERSION:
+        return {}
+    return data.get('files', {})
+
+
+def save_manifest(manifest_path: Path, files: Manifest) -> None:
+    """Atomically write the manifest"""
+    tmp_path: Path = manifest_path.with_name(manifest_path.name + ".tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump({'version': MANIFEST_VERSION, 'files': files}, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, manifest_path)
+
+
+def make_entry(st: os.stat_result, digest: str, crc: int, method: str) -> ManifestEntry:
+    """Manifest entry for a file that was just written to the archive"""
+    return {
+        'size': st.st_size,
+        'mtime': st.st_mtime_ns,
+        'sha256': digest,
+        'crc': crc,
+        'method': method,
+    }
+
+
+def is_unchanged(file_path: Path, st: os.stat_result, entry: Optional[ManifestEntry]) -> bool:
+    """
+    True if the file matches its manifest entry.
+    Size and mtime equal means unchanged without reading; a touched file
+    with the same size is confirmed by hashing its content.
+    """
+    if entry is None or entry.get('size') != st.st_size:
+        return False
+    if entry.get('mtime') == st.st_mtime_ns:
+        return True
+    return entry.get('sha256') == hash_file(file_path)
@@ -0,0 +1,166 @@
+"""
+Per-file compression policy
+
+A project's "compression" config picks a method per file extension:
+
+    "compression": {
+        "default": "auto",
+        "autoMaxRatio": 0.9,
+        "extensions": {".png": "store", ".log": "deflate:9", ".csv": "lzma"}
+    }
+
+Methods are "store", "deflate[:level]", "bzip2[:level]", "lzma" and
+"auto[:level]". Auto compresses a sample of the file's first block and
+stores the file when the sample compresses to more than autoMaxRatio of
+its size (0.9: saves less than 10%).
+"""
+
+import zipfile
+import zlib
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+DEFAULT_METHOD: str = "deflate"
+AUTO_SAMPLE_SIZE: int = 64 * 1024
+AUTO_MAX_RATIO: float = 0.9
+
+# Formats that are already compressed, stored under "auto" without sampling
+COMPRESSED_EXTENSIONS: List[str] = [
+    ".png", ".jpg", ".jpeg", ".gif", ".webp", ".avif", ".ico",
+    ".zip", ".gz", ".tgz", ".bz2", ".xz", ".7z", ".rar", ".zst", ".jar", ".whl",
+    ".woff", ".woff2", ".mp3", ".mp4", ".m4a", ".mkv", ".webm", ".mov", ".ogg",
+    ".pdf", ".docx", ".xlsx", ".pptx",
+]
+
+METHODS: Dict[str, int] = {
+    'store': zipfile.ZIP_STORED,
+    'deflate': zipfile.ZIP_DEFLATED,
+    'bzip2': zipfile.ZIP_BZIP2,
+    'lzma': zipfile.ZIP_LZMA,
+}
+
+LEVEL_RANGES: Dict[str, range] = {
+    'deflate': range(0, 10),
+    'bzip2': range(1, 10),
+    'auto': range(0, 10),
+}
+
+
+class Method(NamedTuple):
+    compress_type: int
+    level: Optional[int]
+    label: str
+
+
+# Pseudo method for members copied from the previous archive
+REUSED_METHOD: Method = Method(zipfile.ZIP_STORED, None, "reused")
+
+
+def split_spec(spec: str) -> Tuple[str, Optional[int]]:
+    """'deflate:9' -> ('deflate', 9), validating name and level"""
+    name, _, level_str = spec.strip().lower().partition(':')
+    if name not in METHODS and name != 'auto':
+        raise Exception(f"Unknown compression method '{spec}'. "
+                        f"Use one of: {', '.join(list(METHODS) + ['auto'])}")
+
+    level: Optional[int] = None
+    if level_str:
+        if name not in LEVEL_RANGES or not level_str.isdigit() or int(level_str) not in LEVEL_RANGES[name]:
+            raise Exception(f"Invalid compression level in '{spec}'")
+        level = int(level_str)
+    return name, level
+
+
+def parse_method(spec: str) -> Method:
+    """Resolve a non-auto spec to a Method"""
+    name, level = split_spec(spec)
+    if name == 'auto':
+        raise Exception("'auto' must be resolved against a sample")
+    label: str = name if level is None else f"{name}:{level}"
+    return Method(METHODS[name], level, label)
+
+
+def is_auto(spec: str) -> bool:
+    """True for 'auto' and 'auto:N' specs"""
+    return split_spec(spec)[0] == 'auto'
+
+
+def sample_ratio(sample: bytes) -> float:
+    """Compressed/original size of a sample at fast deflate"""
+    if not sample:
+        return 1.0
+    return len(zlib.compress(sample, 1)) / len(sample)
+
+
+def resolve_method(spec: str, sample: bytes, max_ratio: float = AUTO_MAX_RATIO) -> Method:
+    """Resolve a spec, sampling the first block for auto"""
+    name, level = split_spec(spec)
+    if name != 'auto':
+        return parse_method(spec)
+    if sample and sample_ratio(sample[:AUTO_SAMPLE_SIZE]) > max_ratio:
+        return Method(zipfile.ZIP_STORED, None, "auto:store")
+    label: str = "auto:deflate" if level is None else f"auto:deflate:{level}"
+    return Method(zipfile.ZIP_DEFLATED, level, label)
+
+
+def resolve_method_for_file(file_path: Path, spec: str, max_ratio: float = AUTO_MAX_RATIO) -> Method:
+    """resolve_method reading the sample from the file itself"""
+    sample: bytes = b''
+    if is_auto(spec):
+        with open(file_path, 'rb') as f:
+            sample = f.read(AUTO_SAMPLE_SIZE)
+    return resolve_method(spec, sample, max_ratio)
+
+
+class CompressionPolicy:
+    """Compression method lookup built from a project's "compression" config"""
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None) -> None:
+        config = config or {}
+        self.default: str = config.get('default', DEFAULT_METHOD)
+        self.max_ratio: float = float(config.get('autoMaxRatio', AUTO_MAX_RATIO))
+        # Longest extension first so '.tar.gz' wins over '.gz'
+        self.extensions: List[Tuple[str, str]] = sorted(
+            ((ext.lower(), spec) for ext, spec in config.get('extensions', {}).items()),
+            key=lambda item: -len(item[0])
+        )
+
+        for spec in [self.default, *(spec for _, spec in self.extensions)]:
+            split_spec(spec)
+
+    def spec_for(self, file_name: str) -> str:
+        """Method spec for a file name, longest matching extension first"""
+        lowered: str = file_name.lower()
+        for ext, spec in self.extensions:
+            if lowered.endswith(ext):
+                return spec
+        if is_auto(self.default) and any(lowered.endswith(ext) for ext in COMPRESSED_EXTENSIONS):
+            return "store"
+        return self.default
+
+
+class PolicyStats:
+    """Per-method totals for the end-of-run summary"""
+
+    def __init__(self) -> None:
+        self.rows: Dict[str, Dict[str, Any]] = {}
+
+    def add(self, method: Method, bytes_in: int, bytes_out: int, seconds: float) -> None:
+        row: Dict[str, Any] = self.rows.setdefault(method.label, {
+            'method': method, 'files': 0, 'bytes_in': 0, 'bytes_out': 0, 'seconds': 0.0,
+        })
+        row['files'] += 1
+        row['bytes_in'] += bytes_in
+        row['bytes_out'] += bytes_out
+        row['seconds'] += seconds
+
+    def deflate_seconds_per_byte(self) -> Optional[float]:
+        """Observed cost of deflate in this run, the baseline for time saved"""
+        seconds: float = 0.0
+        size: int = 0
+        for row in self.rows.values():
+            method: Method = row['method']
+            if method.compress_type == zipfile.ZIP_DEFLATED and method != REUSED_METHOD:
+                seconds += row['seconds']
+                size += row['bytes_in']
+        return seconds / size if size and seconds else None
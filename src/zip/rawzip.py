@@ -0,0 +1,159 @@
+"""
+Raw ZIP member helpers
+
+zipfile has no public API for writing data that is already compressed, so
+these helpers write local headers and payloads directly into an open
+ZipFile and register the member for the central directory written on close.
+"""
+
+import os
+import struct
+import time
+import zipfile
+from pathlib import Path
+from typing import Any, BinaryIO, Iterable, Iterator, Optional, Tuple
+
+CHUNK_SIZE: int = 1024 * 1024
+
+
+def read_chunks(fp: BinaryIO, length: Optional[int] = None, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """Yield fixed-size chunks from fp, stopping after length bytes if given"""
+    remaining: Optional[int] = length
+    while remaining is None or remaining > 0:
+        size: int = chunk_size if remaining is None else min(chunk_size, remaining)
+        chunk: bytes = fp.read(size)
+        if not chunk:
+            break
+        if remaining is not None:
+            remaining -= len(chunk)
+        yield chunk
+
+
+class TimedReader:
+    """Read-only wrapper that adds up the time spent in read()"""
+
+    def __init__(self, source: BinaryIO) -> None:
+        self.source: BinaryIO = source
+        self.seconds: float = 0.0
+
+    def read(self, size: int = -1) -> bytes:
+        start: float = time.perf_counter()
+        data: bytes = self.source.read(size)
+        self.seconds += time.perf_counter() - start
+        return data
+
+
+class CountingWriter:
+    """Write-only wrapper that counts bytes passed through to an unseekable stream"""
+
+    def __init__(self, target: BinaryIO) -> None:
+        self.target: BinaryIO = target
+        self.written: int = 0
+
+    def write(self, data: bytes) -> int:
+        self.target.write(data)
+        self.written += len(data)
+        return len(data)
+
+    def flush(self) -> None:
+        self.target.flush()
+
+
+def make_zipinfo(file_path: Path, arcname: str, st: Optional[os.stat_result] = None) -> zipfile.ZipInfo:
+    """
+    Build a ZipInfo for a file the same way ZipFile.write does.
+    Pass st from the scan to avoid stat-ing the file again.
+    """
+    if st is None:
+        zinfo: zipfile.ZipInfo = zipfile.ZipInfo.from_file(file_path, arcname)
+    else:
+        date_time = time.localtime(st.st_mtime)[0:6]
+        if date_time[0] < 1980:
+            date_time = (1980, 1, 1, 0, 0, 0)
+        zinfo = zipfile.ZipInfo(arcname, date_time)
+        zinfo.external_attr = (st.st_mode & 0xFFFF) << 16
+        zinfo.file_size = st.st_size
+    zinfo.compress_type = zipfile.ZIP_DEFLATED
+    return zinfo
+
+
+def write_file_member(zipf: zipfile.ZipFile, file_path: Path, zinfo: zipfile.ZipInfo,
+                      hasher: Optional[Any] = None) -> Tuple[int, float]:
+    """
+    Compress a file into zipf in fixed-size chunks, optionally feeding
+    the same chunks to a hashlib object so the file is only read once.
+    Returns the number of uncompressed bytes read and the seconds spent
+    reading them.
+    """
+    read: int = 0
+    with open(file_path, 'rb') as f, zipf.open(zinfo, 'w') as dest:
+        src: TimedReader = TimedReader(f)
+        for chunk in read_chunks(src):
+            if hasher is not None:
+                hasher.update(chunk)
+            dest.write(chunk)
+            read += len(chunk)
+    return read, src.seconds
+
+
+def write_raw_member(zipf: zipfile.ZipFile, zinfo: zipfile.ZipInfo, chunks: Iterable[bytes]) -> int:
+    """
+    Write an already compressed member into zipf.
+    zinfo must carry final CRC, compress_size, file_size and compress_type.
+    Returns the number of payload bytes written.
+    """
+    if zipf._writing:
+        raise ValueError("Can't write raw member while another member is open for writing")
+
+    zip64: bool = (zinfo.file_size > zipfile.ZIP64_LIMIT or
+                   zinfo.compress_size > zipfile.ZIP64_LIMIT)
+    zinfo.flag_bits &= ~0x08  # sizes are known up front, no data descriptor
+    if zinfo.compress_type == zipfile.ZIP_LZMA:
+        zinfo.flag_bits |= zipfile._MASK_COMPRESS_OPTION_1
+    zipf._writecheck(zinfo)
+    zipf._didModify = True
+
+    zinfo.header_offset = zipf.fp.tell()
+    zipf.fp.write(zinfo.FileHeader(zip64))
+
+    written: int = 0
+    for chunk in chunks:
+        zipf.fp.write(chunk)
+        written += len(chunk)
+
+    if written != zinfo.compress_size:
+        raise zipfile.BadZipFile(
+            f"Raw member {zinfo.filename} wrote {written} bytes, expected {zinfo.compress_size}"
+        )
+
+    zipf.start_dir = zipf.fp.tell()
+    zipf.filelist.append(zinfo)
+    zipf.NameToInfo[zinfo.filename] = zinfo
+    return written
+
+
+def iter_raw_member(src: zipfile.ZipFile, info: zipfile.ZipInfo) -> Iterator[bytes]:
+    """Yield the compressed payload of a member without decompressing it"""
+    fp = src.fp
+    fp.seek(info.header_offset)
+    header: bytes = fp.read(zipfile.sizeFileHeader)
+    if len(header) != zipfile.sizeFileHeader:
+        raise zipfile.BadZipFile(f"Truncated local header for {info.filename}")
+
+    fields = struct.unpack(zipfile.structFileHeader, header)
+    if fields[zipfile._FH_SIGNATURE] != zipfile.stringFileHeader:
+        raise zipfile.BadZipFile(f"Bad local header magic for {info.filename}")
+
+    fp.seek(fields[zipfile._FH_FILENAME_LENGTH] + fields[zipfile._FH_EXTRA_FIELD_LENGTH], 1)
+    yield from read_chunks(fp, info.compress_size)
+
+
+def copy_raw_member(src: zipfile.ZipFile, info: zipfile.ZipInfo,
+                    dest: zipfile.ZipFile, zinfo: zipfile.ZipInfo) -> int:
+    """Copy a member's compressed bytes from src into dest under zinfo's name and metadata"""
+    zinfo.compress_type = info.compress_type
+    zinfo.flag_bits = info.flag_bits
+    zinfo.CRC = info.CRC
+    zinfo.compress_size = info.compress_size
+    zinfo.file_size = info.file_size
+    return write_raw_member(dest, zinfo, iter_raw_member(src, info))
@@ -0,0 +1,99 @@
+"""
+zip_tool timing and throughput instrumentation
+
+ZipProfile collects wall time per phase, bytes read and written and
+per-file timings for one archive, with the time spent reading files
+apart from compressing them, and renders them as a text table or a
+JSON-ready dict.
+"""
+
+import heapq
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Tuple
+
+SAMPLE_FILES: int = 10
+TOP_FILES: int = 10
+
+
+class ZipProfile:
+    """Timings and counters for one archive build"""
+
+    def __init__(self, top_n: int = TOP_FILES) -> None:
+        self.top_n: int = top_n
+        self.phases: Dict[str, float] = {}
+        self.bytes_read: int = 0
+        self.bytes_written: int = 0
+        self.files: int = 0
+        self.read_seconds: float = 0.0
+        self.compress_seconds: float = 0.0
+        self.sample: List[Tuple[str, int]] = []
+        self._slowest: List[Tuple[float, str, int, int, str, float]] = []
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Time a block; repeated phases accumulate"""
+        start: float = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
+
+    def add_file(self, arcname: str, size: int, compressed: int, seconds: float, method: str,
+                 read_seconds: float = 0.0) -> None:
+        """Record one member compressed in this run; seconds includes its read_seconds"""
+        self.bytes_read += size
+        self.read_seconds += read_seconds
+        self.compress_seconds += seconds - read_seconds
+        item: Tuple[float, str, int, int, str, float] = (seconds, arcname, size, compressed, method, read_seconds)
+        if len(self._slowest) < self.top_n:
+            heapq.heappush(self._slowest, item)
+        elif self.top_n:
+            heapq.heappushpop(self._slowest, item)
+
+    def slowest(self) -> List[Dict[str, Any]]:
+        return [
+            {'path': arcname, 'size': size, 'compressed': compressed, 'seconds': round(seconds, 6),
+             'read_seconds': round(read_seconds, 6), 'method': method}
+            for seconds, arcname, size, compressed, method, read_seconds in sorted(self._slowest, reverse=True)
+        ]
+
+    def total_seconds(self) -> float:
+        return sum(self.phases.values())
+
+    def to_dict(self) -> Dict[str, Any]:
+        total: float = self.total_seconds()
+        return {
+            'phases': {name: round(seconds, 6) for name, seconds in self.phases.items()},
+            'total_seconds': round(total, 6),
+            'files': self.files,
+            'bytes_read': self.bytes_read,
+            'bytes_written': self.bytes_written,
+            'read_seconds': round(self.read_seconds, 6),
+            'compress_cpu_seconds': round(self.compress_seconds, 6),
+            'files_per_second': round(self.files / total, 2) if total else None,
+            'read_mb_per_second': round(self.bytes_read / total / 1e6, 2) if total else None,
+            'write_mb_per_second': round(self.bytes_written / total / 1e6, 2) if total else None,
+            'slowest_files': self.slowest(),
+            'sample_files': [{'path': arcname, 'size': size} for arcname, size in self.sample],
+        }
+
+    def text_lines(self) -> List[str]:
+        data: Dict[str, Any] = self.to_dict()
+        total: float = data['total_seconds'] or 1.0
+        lines: List[str] = ["  phase            seconds      %"]
+        for name, seconds in data['phases'].items():
+            lines.append(f"  {name:<14} {seconds:>9.3f} {seconds / total * 100:>6.1f}")
+        lines.append(f"  {'total':<14} {data['total_seconds']:>9.3f}")
+        lines.append(f"  {data['files']} files, {data['bytes_read']} bytes read, "
+                     f"{data['bytes_written']} bytes written")
+        lines.append(f"  {data['files_per_second']} files/s, {data['read_mb_per_second']} MB/s read, "
+                     f"{data['write_mb_per_second']} MB/s written, "
+                     f"{data['read_seconds']:.3f}s reading, {data['compress_cpu_seconds']:.3f}s compress CPU")
+        if data['slowest_files']:
+            lines.append(f"  Slowest {len(data['slowest_files'])} files to read and compress:")
+            for item in data['slowest_files']:
+                lines.append(f"    {item['seconds']:>9.4f}s  {item['path']} "
+                             f"({item['size']} -> {item['compressed']} bytes, {item['method']}, "
+                             f"{item['read_seconds']:.4f}s reading)")
+        return lines
@@ -0,0 +1,166 @@
+"""
+Project scanning with a compiled exclusion matcher
+
+excludeFolders entries match whole path components (or a trailing run of
+components when they contain a slash) and excluded directories are pruned
+before they are entered. excludeFiles patterns are compiled into a name
+set plus one regex for the wildcard patterns. Projects can also honour
+.gitignore files (utils.gitignore), pruned the same way.
+"""
+
+import os
+import re
+import threading
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Callable, Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Pattern, Set, Tuple
+
+from utils.gitignore import GitignoreStack
+
+
+def is_wildcard(pattern: str) -> bool:
+    """Only a leading or trailing '*' is a wildcard; 'a*b' is an exact name"""
+    return pattern.startswith('*') or pattern.endswith('*')
+
+
+def wildcard_regex(pattern: str) -> str:
+    """'*x' ends with x, 'x*' starts with x, '*x*' contains x; inner '*' are literal"""
+    lead: bool = pattern.startswith('*')
+    trail: bool = pattern.endswith('*') and len(pattern) > 1
+    core: str = pattern[1 if lead else 0:len(pattern) - 1 if trail else len(pattern)]
+    return ('.*' if lead else '') + re.escape(core) + ('.*' if trail else '')
+
+
+def compile_wildcards(patterns: Iterable[str]) -> Optional[Pattern[str]]:
+    """Compile wildcard patterns into one anchored regex, None if there are none"""
+    parts: List[str] = [wildcard_regex(p) for p in patterns]
+    if not parts:
+        return None
+    return re.compile(r'(?:' + '|'.join(parts) + r')\Z', re.DOTALL)
+
+
+class ExclusionMatcher:
+    """excludeFolders / excludeFiles compiled once for a whole scan"""
+
+    def __init__(self, exclude_folders: List[str], exclude_files: List[str]) -> None:
+        folders: List[str] = [f.replace('\\', '/').strip('/') for f in exclude_folders if f.strip('/\\')]
+        self.folder_names: FrozenSet[str] = frozenset(f for f in folders if '/' not in f)
+        self.folder_paths: Tuple[str, ...] = tuple(f for f in folders if '/' in f)
+
+        self.file_names: FrozenSet[str] = frozenset(p for p in exclude_files if not is_wildcard(p))
+        self.file_pattern: Optional[Pattern[str]] = compile_wildcards(p for p in exclude_files if is_wildcard(p))
+
+    def excludes_dir(self, name: str, rel_dir: str = "") -> bool:
+        """True if the directory (name, posix path relative to the root) is excluded"""
+        if name in self.folder_names:
+            return True
+        for folder in self.folder_paths:
+            if rel_dir == folder or rel_dir.endswith('/' + folder):
+                return True
+        return False
+
+    def excludes_file(self, name: str) -> bool:
+        """True if the file name is excluded"""
+        if name in self.file_names:
+            return True
+        return self.file_pattern is not None and self.file_pattern.match(name) is not None
+
+
+class DirItem(NamedTuple):
+    name: str
+    path: str
+    is_dir: bool
+    is_file: bool
+
+
+def list_dir(dir_path: str) -> List[DirItem]:
+    """One directory listing, sorted by name, with type info from scandir"""
+    items: List[DirItem] = []
+    with os.scandir(dir_path) as it:
+        for entry in it:
+            try:
+                is_dir: bool = entry.is_dir(follow_symlinks=False)
+                is_file: bool = not is_dir and entry.is_file()
+            except OSError:
+                continue
+            items.append(DirItem(entry.name, entry.path, is_dir, is_file))
+    items.sort(key=lambda item: item.name)
+    return items
+
+
+class ScanCache:
+    """
+    Directory listings shared between scans of overlapping roots.
+    Thread-safe: concurrent scans asking for the same directory wait for
+    the one listing in flight instead of listing it again.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._listings: Dict[str, Future] = {}
+        self.hits: int = 0
+        self.misses: int = 0
+
+    def list_dir(self, dir_path: str) -> List[DirItem]:
+        with self._lock:
+            future: Optional[Future] = self._listings.get(dir_path)
+            owner: bool = future is None
+            if owner:
+                future = self._listings[dir_path] = Future()
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        if owner:
+            try:
+                future.set_result(list_dir(dir_path))
+            except OSError as e:
+                future.set_exception(e)
+        return future.result()
+
+
+def scan_files(root_path: Path, matcher: ExclusionMatcher,
+               skip: Optional[Set[Path]] = None,
+               cache: Optional[ScanCache] = None,
+               gitignore: Optional[GitignoreStack] = None) -> List[Path]:
+    """
+    Walk root_path with os.scandir, pruning excluded directories, and
+    return included files in a stable (sorted, depth-first) order.
+    Paths in skip (absolute) are left out. With a cache, listings are
+    shared with other scans using the same cache. With a GitignoreStack,
+    .gitignore files at every level are honoured as well.
+    """
+    lister: Callable[[str], List[DirItem]] = cache.list_dir if cache is not None else list_dir
+    skip_names: Set[str] = {p.name for p in skip} if skip else set()
+    files: List[Path] = []
+    stack: List[Tuple[str, str, Optional[GitignoreStack]]] = [(str(root_path), "", gitignore)]
+
+    while stack:
+        dir_path, rel_dir, ignore = stack.pop()
+        try:
+            items: List[DirItem] = lister(dir_path)
+        except OSError:
+            continue
+
+        if ignore is not None:
+            ignore = ignore.enter(dir_path, [item.name for item in items])
+        check_ignore: bool = ignore is not None and bool(ignore.rules)
+
+        subdirs: List[Tuple[str, str, Optional[GitignoreStack]]] = []
+        for item in items:
+            rel: str = f"{rel_dir}/{item.name}" if rel_dir else item.name
+            if item.is_dir:
+                if not matcher.excludes_dir(item.name, rel) and not (check_ignore and ignore.ignored(item.path, True)):
+                    subdirs.append((item.path, rel, ignore))
+                continue
+            if not item.is_file or matcher.excludes_file(item.name):
+                continue
+            if check_ignore and ignore.ignored(item.path, False):
+                continue
+            if item.name in skip_names and Path(item.path).resolve() in skip:
+                continue
+            files.append(Path(item.path))
+
+        stack.extend(reversed(subdirs))
+
+    return files